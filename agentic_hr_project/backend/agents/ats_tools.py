@@ -5,31 +5,274 @@ from typing import List, Dict, Any
 from sentence_transformers import SentenceTransformer
 from pypdf import PdfReader
 import pickle
+import hashlib
+import msgpack
 import docx2txt
 import re
+import functools
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from services.cv_service import CVService
+from config.threading_config import available_cpus
+from services.cv_service import get_cv_service
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+MODEL_HUB_ID = 'sentence-transformers/all-MiniLM-L6-v2'
+MAX_SEQ_LENGTH = 256
+ONNX_MODEL_DIR = "cv_index_model_onnx"
+ONNX_MODEL_FILE = "model_quantized.onnx"
+
+# Extracted text and embeddings are cached per file content hash, one small file per CV
+EXTRACT_CACHE_DIR = "extract_cache"
+EXTRACT_CACHE_MAX_ENTRIES = 2000
+LEGACY_EXTRACT_CACHE_FILE = "extract_cache.pkl"
+
+# Text past this point adds little to a CV's embedding or extracted fields
+MAX_PDF_PAGES = 8
+MAX_PDF_TEXT_LENGTH = 100_000
+
+# Vector store files; CV texts are not stored here, MongoDB holds them
+INDEX_FILE = "cv_index.faiss"
+METADATA_FILE = "metadata_light.msgpack"
+LEGACY_CV_TEXTS_FILE = "cv_texts.npy"
+INDEX_FORMAT_VERSION = 2
+
+# CVs are embedded as overlapping token windows that fit within MAX_SEQ_LENGTH
+CHUNK_SIZE = 220
+CHUNK_STRIDE = 180
+ENCODE_BATCH_SIZE = 128
+
+# Padding to a few fixed lengths lets ONNX Runtime reuse its per-shape memory plans
+SEQ_PAD_MULTIPLE = 32
+QUERY_CACHE_SIZE = 1024
+
+# Brute-force inner product search beats HNSW graph traversal on small corpora
+HNSW_MIN_VECTORS = 1000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+# Copying to GPU only pays off once the index is large enough
+GPU_MIN_VECTORS = 10000
+SEARCH_BATCH_WINDOW_SECONDS = 0.005
+
+# Variable-width strings keep the text-search corpus from padding every row to the longest CV
+SEARCH_CORPUS_DTYPE = np.dtypes.StringDType() if hasattr(getattr(np, "dtypes", None), "StringDType") else str
+SEARCH_FIELD_SEPARATOR = "\x00"
+
+# CV information extraction patterns, compiled once
+SKILL_RE = re.compile(
+    r'\b(?:Java|Python|JavaScript|React|Angular|Vue|Node\.js|Spring|Django|Flask'
+    r'|AWS|Azure|Docker|Kubernetes|Git|Jenkins|MySQL|PostgreSQL|MongoDB'
+    r'|HTML|CSS|TypeScript|jQuery|Bootstrap)\b',
+    re.IGNORECASE
+)
+EXPERIENCE_RES = (
+    re.compile(r'(\d+)\+?\s*years?\s*(?:of\s*)?experience', re.IGNORECASE),
+    re.compile(r'experience[:\s]*(\d+)\+?\s*years?', re.IGNORECASE)
+)
+EDUCATION_RES = (
+    re.compile(r'(?:Bachelor|Master|PhD|BSc|MSc)[^.]*', re.IGNORECASE),
+    re.compile(r'University[^.]*', re.IGNORECASE)
+)
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_RE = re.compile(r'\+?[\d\s\-\(\)]{10,}')
+
+# Hyperscan pattern ids; skills are collected from the scan, the rest only flag which re passes to run
+HS_SKILL_ID = 0
+HS_PREFILTER_RES = EXPERIENCE_RES + EDUCATION_RES + (EMAIL_RE, PHONE_RE)
+
+def _build_hyperscan_db():
+    """Compile every CV extraction pattern into one Hyperscan database, if available"""
+    if hyperscan is None:
+        return None
+    
+    try:
+        patterns = (SKILL_RE,) + HS_PREFILTER_RES
+        flags = [hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST]
+        flags += [
+            hyperscan.HS_FLAG_SINGLEMATCH | (hyperscan.HS_FLAG_CASELESS if pattern.flags & re.IGNORECASE else 0)
+            for pattern in HS_PREFILTER_RES
+        ]
+        
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[pattern.pattern.encode("utf-8") for pattern in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=flags
+        )
+        return db
+    except Exception as e:
+        logger.warning("⚠️ Hyperscan unavailable, using re for CV extraction: %s", e)
+        return None
+
+
+HS_DB = _build_hyperscan_db()
+HS_LOCK = threading.Lock()
+
+
+def _hyperscan_cv_text(cv_text: str):
+    """Scan ASCII CV text once, returning matched skills and the ids of prefilter patterns that hit"""
+    data = cv_text.encode("ascii")
+    skills = []
+    hit_ids = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        if pattern_id == HS_SKILL_ID:
+            skills.append(cv_text[start:end])
+        else:
+            hit_ids.add(pattern_id)
+    
+    # A database shares one scratch space, so scans must not overlap
+    with HS_LOCK:
+        HS_DB.scan(data, match_event_handler=on_match)
+    
+    return skills, hit_ids
+
+
+def _extract_static(file_path: str) -> str:
+    """Extract text from a CV file; module-level so extraction threads share no ATSTools state"""
+    try:
+        file_extension = os.path.splitext(file_path)[1].lower()
+        
+        if file_extension == '.pdf':
+            return _extract_from_pdf(file_path)
+        elif file_extension == '.docx':
+            return _extract_from_docx(file_path)
+        elif file_extension == '.txt':
+            return _extract_from_txt(file_path)
+        else:
+            return f"Unsupported file format: {file_extension}"
+            
+    except Exception as e:
+        return f"Error reading file: {str(e)}"
+
+def _extract_from_pdf(pdf_path: str) -> str:
+    """Extract text from PDF file"""
+    try:
+        reader = PdfReader(pdf_path, strict=False)
+        parts = []
+        total_length = 0
+        for page_number, page in enumerate(reader.pages):
+            if page_number >= MAX_PDF_PAGES or total_length >= MAX_PDF_TEXT_LENGTH:
+                break
+            page_text = page.extract_text() or ""
+            parts.append(page_text)
+            total_length += len(page_text)
+        return "".join(parts)
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
+def _extract_from_docx(docx_path: str) -> str:
+    """Extract text from DOCX file"""
+    try:
+        text = docx2txt.process(docx_path)
+        return text
+    except Exception as e:
+        return f"Error reading DOCX: {str(e)}"
+
+def _extract_from_txt(txt_path: str) -> str:
+    """Extract text from TXT file"""
+    try:
+        with open(txt_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except Exception as e:
+        return f"Error reading TXT: {str(e)}"
+
+class _SearchBatcher:
+    """Coalesce concurrent index searches into a single batched search call"""
+    
+    def __init__(self, window_seconds: float = SEARCH_BATCH_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._pending = []
+        self._collecting = False
+    
+    def search(self, index, query_embedding: np.ndarray, k: int):
+        """Search the index, sharing one call with queries that arrive in the same window"""
+        request = {"query": query_embedding, "k": k, "done": threading.Event()}
+        
+        with self._lock:
+            self._pending.append(request)
+            is_leader = not self._collecting
+            self._collecting = True
+        
+        # The first caller in a window waits for others, then searches for everyone
+        if is_leader:
+            time.sleep(self.window_seconds)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._collecting = False
+            self._run_batch(index, batch)
+        
+        request["done"].wait()
+        if "error" in request:
+            raise request["error"]
+        return request["scores"], request["ids"]
+    
+    def _run_batch(self, index, batch: List[Dict[str, Any]]):
+        """Run one search for a batch of queries and hand results back to each caller"""
+        try:
+            k = max(request["k"] for request in batch)
+            scores, ids = index.search(np.vstack([request["query"] for request in batch]), k)
+            for i, request in enumerate(batch):
+                request["scores"] = scores[i:i + 1, :request["k"]]
+                request["ids"] = ids[i:i + 1, :request["k"]]
+        except Exception as e:
+            for request in batch:
+                request["error"] = e
+        finally:
+            for request in batch:
+                request["done"].set()
 
 class ATSTools:
     def __init__(self, data_dir: str):
+        self._configure_threads()
+        
         self.data_dir = data_dir
         self.cv_dir = os.path.join(data_dir, "cv_uploads")
         self.vector_store_dir = os.path.join(data_dir, "vector_store")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self._model = None
+        self.tokenizer = None
+        self.onnx_model = None
+        self._encoder_loaded = False
+        self._encoder_lock = threading.Lock()
         self.index = None
-        self.cv_metadata = []
-        self.cv_service = CVService()
+        self._index_mmapped = False
+        self._gpu_index = None
+        self._gpu_resources = None
+        self._search_batcher = _SearchBatcher()
+        self.cv_metadata = {}
+        self._search_corpus = None
+        self._search_corpus_key = None
+        self.cv_service = get_cv_service()
         
         # Ensure directories exist
         os.makedirs(self.cv_dir, exist_ok=True)
         os.makedirs(self.vector_store_dir, exist_ok=True)
         
-        print("✅ ATSTools initialized")
-        print(f"📁 CV directory: {self.cv_dir}")
-        print(f"🗂️ Vector store directory: {self.vector_store_dir}")
+        # Per-machine cache of extracted CV text and embeddings keyed by file content hash
+        self._cache_dir = os.path.join(self.vector_store_dir, EXTRACT_CACHE_DIR)
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._drop_legacy_extract_cache()
+        
+        # Repeated searches reuse the query embedding instead of re-running the model
+        self._encode_query = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query_bytes)
+        
+        logger.info("✅ ATSTools initialized")
+        logger.info("📁 CV directory: %s", self.cv_dir)
+        logger.info("🗂️ Vector store directory: %s", self.vector_store_dir)
         
         # Load existing index if available
         self._load_index()
@@ -40,74 +283,56 @@ class ATSTools:
         # Build vector index from database (no hardcoded samples)
         self._build_vector_index_from_database()
     
+    def _configure_threads(self):
+        """Let torch and FAISS use every CPU this process may run on for encoding and search"""
+        num_threads = available_cpus()
+        
+        try:
+            import torch
+            torch.set_num_threads(num_threads)
+            # Inter-op threads can only be set once per process
+            torch.set_num_interop_threads(max(1, num_threads // 4))
+        except (ImportError, RuntimeError):
+            pass
+        
+        faiss.omp_set_num_threads(num_threads)
+        logger.info("🧵 Using %s threads for encoding and search", num_threads)
+    
     def _build_vector_index_from_database(self):
         """Build vector index from existing database candidates only"""
         try:
-            # Get all candidates from database
-            db_candidates = self.cv_service.get_all_candidates()
+            # Get all unique candidates from database
+            db_candidates = self.cv_service.get_unique_candidates()
             
             if not db_candidates:
-                print("📋 No candidates found in database - vector index will be empty")
+                logger.debug("📋 No candidates found in database - vector index will be empty")
                 return
             
-            print(f"🔧 Building vector index from {len(db_candidates)} database candidates...")
+            logger.info("🔧 Building vector index from %s database candidates...", len(db_candidates))
             
             # Check if we already have these candidates in vector index
-            existing_candidate_names = set()
-            if self.cv_metadata:
-                existing_candidate_names = {meta['candidate_name'] for meta in self.cv_metadata}
+            existing_candidate_names = {meta['candidate_name'] for meta in self.cv_metadata.values()}
             
-            new_candidates = []
-            new_metadata = []
-            
-            for candidate in db_candidates:
-                candidate_name = candidate['candidate_name']
-                
-                # Skip if already in vector index
-                if candidate_name in existing_candidate_names:
-                    continue
-                
-                cv_text = candidate.get('cv_text', '')
-                if cv_text:
-                    new_candidates.append(cv_text)
-                    
-                    metadata = {
-                        "candidate_name": candidate["candidate_name"],
-                        "position": candidate["position"],
-                        "cv_text": cv_text,
-                        "skills": candidate.get("skills", []),
-                        "experience_years": candidate.get("experience_years", 0),
-                        "education": candidate.get("education", []),
-                        "contact_info": candidate.get("contact_info", {}),
-                        "summary": candidate.get("summary", "")
-                    }
-                    new_metadata.append(metadata)
+            new_candidates = [
+                candidate for candidate in db_candidates
+                if candidate['candidate_name'] not in existing_candidate_names and candidate.get('cv_text')
+            ]
             
             if new_candidates:
-                print(f"🆕 Adding {len(new_candidates)} new candidates to vector index")
-                
-                # Generate embeddings for new candidates
-                embeddings = self.model.encode(new_candidates)
-                
-                # Initialize or expand index
-                if self.index is None:
-                    self.index = faiss.IndexFlatL2(embeddings.shape[1])
+                logger.info("🆕 Adding %s new candidates to vector index", len(new_candidates))
                 
-                # Add new embeddings
-                self.index.add(embeddings)
+                # Generate normalized CV embeddings for new candidates
+                embeddings = self._embed_documents([candidate['cv_text'] for candidate in new_candidates])
                 
-                # Add new metadata
-                self.cv_metadata.extend(new_metadata)
+                # Add new embeddings and metadata, then save updated index
+                self._add_to_index(embeddings, new_candidates)
                 
-                # Save updated index
-                self._save_index()
-                
-                print(f"✅ Vector index updated. Total candidates: {len(self.cv_metadata)}")
+                logger.info("✅ Vector index updated. Total candidates: %s", len(self.cv_metadata))
             else:
-                print("📋 No new candidates to add to vector index")
+                logger.debug("📋 No new candidates to add to vector index")
                 
         except Exception as e:
-            print(f"❌ Error building vector index from database: {e}")
+            logger.error("❌ Error building vector index from database: %s", e)
     
     def _process_existing_cv_files(self):
         """Process CV files in cv_uploads directory"""
@@ -116,84 +341,125 @@ class ATSTools:
             supported_extensions = {'.pdf', '.docx', '.doc', '.txt'}
             
             if os.path.exists(self.cv_dir):
-                for filename in os.listdir(self.cv_dir):
-                    file_path = os.path.join(self.cv_dir, filename)
-                    if os.path.isfile(file_path):
-                        file_extension = os.path.splitext(filename)[1].lower()
-                        if file_extension in supported_extensions:
-                            cv_files.append(file_path)
-            
-            if cv_files:
-                print(f"📁 Found {len(cv_files)} CV files to process...")
-                
-                for file_path in cv_files:
-                    try:
-                        filename = os.path.basename(file_path)
-                        name_parts = os.path.splitext(filename)[0].split('_')
-                        
-                        if len(name_parts) >= 2:
-                            candidate_name = ' '.join(name_parts[:-1])
-                            position = name_parts[-1].replace('_', ' ')
-                        else:
-                            candidate_name = name_parts[0].replace('_', ' ')
-                            position = "Unknown Position"
-                        
-                        # Check if candidate already exists in database
-                        existing_candidate = self.cv_service.get_candidate_by_name(candidate_name)
-                        if not existing_candidate:
-                            result = self.add_cv_to_database(file_path, candidate_name, position)
-                            if result.get("success"):
-                                print(f"✅ Processed new CV: {candidate_name}")
-                        else:
-                            print(f"⏭️ CV for {candidate_name} already exists, skipping...")
-                            
-                    except Exception as e:
-                        print(f"❌ Error processing {file_path}: {e}")
-            else:
-                print("📁 No CV files found in cv_uploads directory")
+                # scandir entries carry the file type, so there is no extra stat per file
+                with os.scandir(self.cv_dir) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            file_extension = os.path.splitext(entry.name)[1].lower()
+                            if file_extension in supported_extensions:
+                                cv_files.append(entry.path)
+            
+            if not cv_files:
+                logger.debug("📁 No CV files found in cv_uploads directory")
+                return
+            
+            logger.info("📁 Found %s CV files to process...", len(cv_files))
+            
+            # Skip candidates that already exist in database
+            pending = []
+            for file_path in cv_files:
+                candidate_name, position = self._parse_cv_filename(file_path)
+                if self.cv_service.get_candidate_by_name(candidate_name):
+                    logger.debug("⏭️ CV for %s already exists, skipping...", candidate_name)
+                else:
+                    pending.append((file_path, candidate_name, position))
+            
+            if not pending:
+                return
+            
+            # Stage 1: extract text on a thread pool, reusing cached extractions
+            file_hashes = {file_path: self._file_hash(file_path) for file_path, _, _ in pending}
+            cv_texts = [self._cached_text(file_hashes[file_path]) for file_path, _, _ in pending]
+            uncached = [i for i, cv_text in enumerate(cv_texts) if cv_text is None]
+            extracted = self._extract_texts_parallel([pending[i][0] for i in uncached])
+            for i, cv_text in zip(uncached, extracted):
+                cv_texts[i] = cv_text
+            
+            # Stage 2: one database insert, one batched encode and one index add for all new CVs
+            candidates = []
+            for (file_path, candidate_name, position), cv_text in zip(pending, cv_texts):
+                candidate = self._prepare_candidate(file_path, candidate_name, position, cv_text)
+                if "error" in candidate:
+                    logger.warning("❌ Error processing %s: %s", file_path, candidate['error'])
+                else:
+                    candidates.append(candidate)
+            
+            if candidates:
+                result = self._bulk_commit(candidates, file_hashes)
+                logger.info("%s %s", '✅' if result['success'] else '⏭️', result['message'])
                 
         except Exception as e:
-            print(f"❌ Error processing CV files: {e}")
+            logger.error("❌ Error processing CV files: %s", e)
+    
+    def _parse_cv_filename(self, file_path: str):
+        """Derive candidate name and position from a Name_Parts_Position file name"""
+        filename = os.path.basename(file_path)
+        name_parts = os.path.splitext(filename)[0].split('_')
+        
+        if len(name_parts) >= 2:
+            candidate_name = ' '.join(name_parts[:-1])
+            position = name_parts[-1].replace('_', ' ')
+        else:
+            candidate_name = name_parts[0].replace('_', ' ')
+            position = "Unknown Position"
+        
+        return candidate_name, position
+    
+    def _extract_texts_parallel(self, file_paths: List[str]) -> List[str]:
+        """Extract text from many CV files using a thread pool"""
+        if len(file_paths) < 2:
+            return [_extract_static(file_path) for file_path in file_paths]
+        
+        # Threads, not processes: this runs during app import, where spawned workers would re-run
+        # the whole startup and forked ones would inherit the logging and MongoDB threads
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(file_paths), available_cpus())) as executor:
+                return list(executor.map(_extract_static, file_paths))
+        except Exception as e:
+            logger.warning("⚠️ Parallel CV extraction failed, extracting sequentially: %s", e)
+            return [_extract_static(file_path) for file_path in file_paths]
     
     def search_candidates(self, query: str, top_k: int = 5, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Search candidates with deduplication"""
         try:
-            print(f"🔍 Searching candidates for: '{query}'")
+            logger.debug("🔍 Searching candidates for: '%s'", query)
             
             # Get unique candidates from database first
-            db_candidates = self.cv_service.get_all_candidates()
+            db_candidates = self.cv_service.get_unique_candidates()
             
             if not db_candidates:
-                print("❌ No candidates found in database")
+                logger.warning("❌ No candidates found in database")
                 return []
             
-            # Remove duplicates by candidate name + position
-            unique_candidates = {}
-            for candidate in db_candidates:
-                key = f"{candidate['candidate_name']}_{candidate['position']}"
-                if key not in unique_candidates:
-                    unique_candidates[key] = candidate
+            logger.debug("📋 Found %s unique candidates in database", len(db_candidates))
             
-            db_candidates = list(unique_candidates.values())
-            print(f"📋 Found {len(db_candidates)} unique candidates in database")
+            # Index database candidates by name for O(1) lookup of vector hits
+            db_by_name = {candidate["candidate_name"]: candidate for candidate in db_candidates}
             
             # If we have vector index, use semantic search
             if self.index is not None and len(self.cv_metadata) > 0:
-                print("🔍 Using vector similarity search")
+                logger.debug("🔍 Using vector similarity search")
                 
-                # Generate query embedding
-                query_embedding = self.model.encode([query])
+                # Generate normalized query embedding for cosine similarity
+                query_embedding = np.frombuffer(
+                    self._encode_query(query.strip().lower()),
+                    dtype=np.float32
+                ).reshape(1, -1)
                 
-                # Search in vector index
-                scores, indices = self.index.search(query_embedding, min(len(self.cv_metadata), top_k * 2))
+                # Search in vector index (batched with concurrent queries on GPU)
+                k = min(len(self.cv_metadata), top_k * 2)
+                if self._gpu_index is not None:
+                    scores, vector_ids = self._search_batcher.search(self._gpu_index, query_embedding, k)
+                else:
+                    scores, vector_ids = self.index.search(query_embedding, k)
                 
                 # Get unique results based on candidate name
                 seen_candidates = set()
                 results = []
                 
-                for score, idx in zip(scores[0], indices[0]):
-                    if idx != -1 and idx < len(self.cv_metadata):
-                        vector_candidate = self.cv_metadata[idx]
+                for score, vector_id in zip(scores[0], vector_ids[0]):
+                    vector_candidate = self.cv_metadata.get(int(vector_id))
+                    if vector_candidate is not None:
                         candidate_name = vector_candidate["candidate_name"]
                         
                         # Skip if we've already seen this candidate
@@ -202,64 +468,62 @@ class ATSTools:
                         
                         seen_candidates.add(candidate_name)
                         
-                        # Find corresponding database candidate
-                        for db_candidate in db_candidates:
-                            if db_candidate["candidate_name"] == candidate_name:
-                                db_candidate["similarity_score"] = float(score)
-                                results.append(db_candidate)
-                                break
+                        # Find corresponding database candidate, copying so the score stays per-search
+                        db_candidate = db_by_name.get(candidate_name)
+                        if db_candidate is not None:
+                            db_candidate = dict(db_candidate)
+                            db_candidate["similarity_score"] = float(score)
+                            # Cosine similarity is already "higher is better", so it is shown as-is
+                            db_candidate["match_score"] = db_candidate["similarity_score"]
+                            results.append(db_candidate)
                         
                         # Stop when we have enough unique results
                         if len(results) >= top_k:
                             break
                 
-                # Sort by similarity and return top results
-                results = sorted(results, key=lambda x: x.get("similarity_score", float('inf')))[:top_k]
+                # Sort by cosine similarity (higher is better) and return top results
+                results = sorted(results, key=lambda x: x.get("similarity_score", float('-inf')), reverse=True)[:top_k]
                 
             else:
-                print("🔍 Using basic text search (no vector index)")
-                # Fallback to simple text matching
-                results = []
-                query_lower = query.lower()
-                
-                for candidate in db_candidates:
-                    cv_text = candidate.get('cv_text', '').lower()
-                    skills = [skill.lower() for skill in candidate.get('skills', [])]
-                    position = candidate.get('position', '').lower()
-                    
-                    # Simple matching
-                    if (query_lower in cv_text or 
-                        any(query_lower in skill for skill in skills) or
-                        query_lower in position):
-                        results.append(candidate)
-                
-                results = results[:top_k]
+                logger.debug("🔍 Using basic text search (no vector index)")
+                # Fallback to simple text matching over CV text, skills and position in one vectorized pass
+                mask = np.char.find(self._get_search_corpus(db_candidates), query.lower()) >= 0
+                results = [db_candidates[i] for i in np.flatnonzero(mask)[:top_k]]
             
-            print(f"✅ Search completed. Found {len(results)} unique matching candidates")
+            logger.debug("✅ Search completed. Found %s unique matching candidates", len(results))
             return results
             
         except Exception as e:
-            print(f"❌ Error in candidate search: {e}")
+            logger.error("❌ Error in candidate search: %s", e)
             return []
     
+    def _get_search_corpus(self, db_candidates: List[Dict[str, Any]]) -> np.ndarray:
+        """Lower-cased searchable text per candidate, rebuilt only when the candidate set changes"""
+        corpus_key = tuple(candidate["_id"] for candidate in db_candidates)
+        
+        if self._search_corpus is None or self._search_corpus_key != corpus_key:
+            # Fields are joined by a separator no query contains, so matches never span two fields
+            self._search_corpus = np.array([
+                SEARCH_FIELD_SEPARATOR.join(
+                    [candidate.get('cv_text') or '', candidate.get('position') or '']
+                    + list(candidate.get('skills') or [])
+                ).lower()
+                for candidate in db_candidates
+            ], dtype=SEARCH_CORPUS_DTYPE)
+            self._search_corpus_key = corpus_key
+        
+        return self._search_corpus
+    
     def get_all_candidates(self) -> List[Dict[str, Any]]:
         """Get all unique candidates from database"""
         try:
-            db_candidates = self.cv_service.get_all_candidates()
-            
-            # Remove duplicates by candidate name + position
-            unique_candidates = {}
-            for candidate in db_candidates:
-                key = f"{candidate['candidate_name']}_{candidate['position']}"
-                if key not in unique_candidates:
-                    unique_candidates[key] = candidate
-            
-            results = list(unique_candidates.values())
-            print(f"📋 Retrieved {len(results)} unique candidates")
+            # Listings show names, positions and skills only, so the CV text is not fetched
+            results = self.cv_service.get_unique_candidates(include_cv_text=False)
+            logger.debug("📋 Retrieved %s unique candidates", len(results))
             return results
             
         except Exception as e:
-            print(f"❌ Error retrieving candidates: {e}")
+            logger.error("❌ Error retrieving candidates: %s", e)
             return []
     
     def get_candidate_by_name(self, candidate_name: str) -> Dict[str, Any]:
@@ -274,14 +538,14 @@ class ATSTools:
             return {"error": f"Error retrieving candidate: {str(e)}"}
     
     def delete_candidate(self, candidate_name: str) -> Dict[str, Any]:
-        """Delete candidate and rebuild vector index"""
+        """Delete candidate and remove it from vector index"""
         try:
             # Delete from database
             db_result = self.cv_service.delete_candidate_from_db(candidate_name)
             
             if db_result.get("success"):
-                # Rebuild vector index to remove the candidate
-                self._rebuild_vector_index_from_database()
+                # Drop only the deleted candidate's vector
+                self._remove_from_index(db_result["candidate_id"])
                 return db_result
             else:
                 return db_result
@@ -295,66 +559,36 @@ class ATSTools:
     def _rebuild_vector_index_from_database(self):
         """Rebuild vector index completely from database"""
         try:
-            print("🔄 Rebuilding vector index from database...")
+            logger.info("🔄 Rebuilding vector index from database...")
             
             # Clear existing index and metadata
             self.index = None
-            self.cv_metadata = []
+            self._index_mmapped = False
+            self._gpu_index = None
+            self.cv_metadata = {}
             
             # Get all unique candidates from database
-            db_candidates = self.cv_service.get_all_candidates()
+            db_candidates = self.cv_service.get_unique_candidates()
             
             if not db_candidates:
-                print("📋 No candidates in database - vector index cleared")
+                logger.info("📋 No candidates in database - vector index cleared")
                 self._save_index()
                 return
             
-            # Remove duplicates
-            unique_candidates = {}
-            for candidate in db_candidates:
-                key = f"{candidate['candidate_name']}_{candidate['position']}"
-                if key not in unique_candidates:
-                    unique_candidates[key] = candidate
-            
-            db_candidates = list(unique_candidates.values())
-            
             # Build new index
-            cv_texts = []
-            new_metadata = []
-            
-            for candidate in db_candidates:
-                cv_text = candidate.get('cv_text', '')
-                if cv_text:
-                    cv_texts.append(cv_text)
-                    
-                    metadata = {
-                        "candidate_name": candidate["candidate_name"],
-                        "position": candidate["position"],
-                        "cv_text": cv_text,
-                        "skills": candidate.get("skills", []),
-                        "experience_years": candidate.get("experience_years", 0),
-                        "education": candidate.get("education", []),
-                        "contact_info": candidate.get("contact_info", {}),
-                        "summary": candidate.get("summary", "")
-                    }
-                    new_metadata.append(metadata)
-            
-            if cv_texts:
-                # Generate embeddings
-                embeddings = self.model.encode(cv_texts)
+            candidates = [candidate for candidate in db_candidates if candidate.get('cv_text')]
+            
+            if candidates:
+                # Generate normalized embeddings
+                embeddings = self._embed_documents([candidate['cv_text'] for candidate in candidates])
                 
-                # Create new index
-                self.index = faiss.IndexFlatL2(embeddings.shape[1])
-                self.index.add(embeddings)
-                self.cv_metadata = new_metadata
+                # Create new index and save it
+                self._add_to_index(embeddings, candidates)
                 
-                print(f"✅ Vector index rebuilt with {len(self.cv_metadata)} unique candidates")
-            
-            # Save updated index
-            self._save_index()
+                logger.info("✅ Vector index rebuilt with %s unique candidates", len(self.cv_metadata))
             
         except Exception as e:
-            print(f"❌ Error rebuilding vector index: {e}")
+            logger.error("❌ Error rebuilding vector index: %s", e)
     
     def add_cv_to_database(self, cv_file_path: str, candidate_name: str, position: str) -> Dict[str, Any]:
         """Add CV to database and update vector index"""
@@ -367,104 +601,365 @@ class ATSTools:
                     "message": f"Candidate {candidate_name} already exists in database"
                 }
             
-            # Extract text from CV file
-            cv_text = self.extract_text_from_file(cv_file_path)
-            
-            if cv_text.startswith("Error"):
-                return {"success": False, "message": cv_text}
-            
-            # Extract information
-            extracted_info = self._extract_cv_information(cv_text)
-            
-            # Prepare candidate data
-            candidate_data = {
-                "candidate_name": candidate_name,
-                "position": position,
-                "cv_file_path": cv_file_path,
-                "cv_text": cv_text,
-                "skills": extracted_info["skills"],
-                "experience_years": extracted_info["experience_years"],
-                "education": extracted_info["education"],
-                "contact_info": extracted_info["contact_info"],
-                "summary": cv_text[:500]
-            }
+            file_hash = self._file_hash(cv_file_path)
+            cv_text = self.extract_text_from_file(cv_file_path, file_hash)
+            candidate = self._prepare_candidate(cv_file_path, candidate_name, position, cv_text)
+            if "error" in candidate:
+                return {"success": False, "message": candidate["error"]}
             
-            # Save to database
-            db_result = self.cv_service.save_candidate_to_db(candidate_data)
+            result = self._bulk_commit([candidate], {cv_file_path: file_hash})
+            if not result["success"]:
+                return result
             
-            if db_result.get("success"):
-                # Add to vector index
-                embedding = self.model.encode([cv_text])
-                
-                if self.index is None:
-                    self.index = faiss.IndexFlatL2(embedding.shape[1])
-                
-                self.index.add(embedding)
-                
-                metadata = {
-                    "candidate_name": candidate_name,
-                    "position": position,
-                    "cv_text": cv_text,
-                    "skills": extracted_info["skills"],
-                    "experience_years": extracted_info["experience_years"],
-                    "education": extracted_info["education"],
-                    "contact_info": extracted_info["contact_info"],
-                    "summary": cv_text[:500]
-                }
-                self.cv_metadata.append(metadata)
-                
-                self._save_index()
-                
-                print(f"✅ Added {candidate_name} to database and vector index")
-            
-            return db_result
+            return {
+                "success": True,
+                "message": f"Candidate {candidate_name} added successfully",
+                "candidate_id": result["candidate_ids"][0]
+            }
             
         except Exception as e:
             return {"success": False, "message": f"Error processing CV: {str(e)}"}
     
-    def extract_text_from_file(self, file_path: str) -> str:
-        """Extract text from various file formats"""
+    def _prepare_candidate(self, cv_file_path: str, candidate_name: str, position: str, cv_text: str = None) -> Dict[str, Any]:
+        """Extract CV text and details without touching database or vector index"""
+        if cv_text is None:
+            cv_text = self.extract_text_from_file(cv_file_path)
+        
+        if cv_text.startswith("Error"):
+            return {"error": cv_text}
+        
+        extracted_info = self._extract_cv_information(cv_text)
+        
+        return {
+            "candidate_name": candidate_name,
+            "position": position,
+            "cv_file_path": cv_file_path,
+            "cv_text": cv_text,
+            "skills": extracted_info["skills"],
+            "experience_years": extracted_info["experience_years"],
+            "education": extracted_info["education"],
+            "contact_info": extracted_info["contact_info"],
+            "summary": cv_text[:500]
+        }
+    
+    def _bulk_commit(self, candidates: List[Dict[str, Any]], file_hashes: Dict[str, str] = None) -> Dict[str, Any]:
+        """Save prepared candidates, then embed and index them in a single batch"""
+        db_result = self.cv_service.save_candidates_to_db(candidates)
+        saved = db_result.get("saved", [])
+        
+        if not saved:
+            return {"success": False, "message": db_result["message"], "candidate_ids": []}
+        
+        # Reuse the caller's content hashes so each file is read for hashing only once
+        file_hashes = file_hashes or {}
+        saved_hashes = [
+            file_hashes.get(candidate["cv_file_path"]) or self._file_hash(candidate["cv_file_path"])
+            for candidate in saved
+        ]
+        
+        # Encode every CV without a cached embedding from the current encoder in one call
+        embedding_key = self._embedding_key()
+        embeddings = [self._cached_embedding(file_hash, embedding_key) for file_hash in saved_hashes]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            new_embeddings = self._embed_documents([saved[i]["cv_text"] for i in missing])
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding[None, :]
+        embeddings = np.vstack(embeddings)
+        
+        self._add_to_index(embeddings, saved)
+        
+        # Only newly encoded CVs need a cache entry written
+        self._save_cache_entries({
+            saved_hashes[i]: {
+                "cv_text": saved[i]["cv_text"],
+                "embedding_key": embedding_key,
+                "embedding": embeddings[i:i + 1]
+            }
+            for i in missing
+        })
+        
+        return {
+            "success": True,
+            "message": f"Added {len(saved)} candidates to database and vector index",
+            "candidate_ids": [str(candidate["_id"]) for candidate in saved]
+        }
+    
+    def _vector_id(self, candidate_id: str) -> int:
+        """Map a MongoDB ObjectId string to a stable non-negative int64 FAISS id"""
+        return int(candidate_id, 16) & 0x7FFFFFFFFFFFFFFF
+    
+    def _add_to_index(self, embeddings: np.ndarray, candidates: List[Dict[str, Any]]):
+        """Add candidate embeddings to the vector index under their database ids and persist it"""
+        if self.index is None:
+            self.index = self._create_index(embeddings.shape[1], len(embeddings))
+        self._ensure_writable_index()
+        
+        if not self.index.is_trained:
+            self.index.train(embeddings)
+        
+        vector_ids = np.array([self._vector_id(str(candidate["_id"])) for candidate in candidates], dtype=np.int64)
+        self.index.add_with_ids(embeddings, vector_ids)
+        
+        for vector_id, candidate in zip(vector_ids.tolist(), candidates):
+            self.cv_metadata[vector_id] = {
+                "vector_id": vector_id,
+                "candidate_name": candidate["candidate_name"],
+                "position": candidate["position"],
+                "skills": candidate.get("skills", []),
+                "experience_years": candidate.get("experience_years", 0),
+                "education": candidate.get("education", []),
+                "contact_info": candidate.get("contact_info", {}),
+                "summary": candidate.get("summary", "")
+            }
+        
+        self._refresh_gpu_index()
+        self._save_index()
+    
+    def _remove_from_index(self, candidate_id: str):
+        """Remove a single candidate's vector from the index without re-encoding the rest"""
+        vector_id = self._vector_id(candidate_id)
+        if self.index is None or vector_id not in self.cv_metadata:
+            return
+        self._ensure_writable_index()
+        
         try:
-            file_extension = os.path.splitext(file_path)[1].lower()
-            
-            if file_extension == '.pdf':
-                return self._extract_from_pdf(file_path)
-            elif file_extension == '.docx':
-                return self._extract_from_docx(file_path)
-            elif file_extension == '.txt':
-                return self._extract_from_txt(file_path)
-            else:
-                return f"Unsupported file format: {file_extension}"
-                
-        except Exception as e:
-            return f"Error reading file: {str(e)}"
+            self.index.remove_ids(np.array([vector_id], dtype=np.int64))
+        except RuntimeError:
+            # HNSW graphs cannot drop vectors in place
+            self._rebuild_vector_index_from_database()
+            return
+        
+        self.cv_metadata.pop(vector_id, None)
+        self._refresh_gpu_index()
+        self._save_index()
+    
+    def _ensure_writable_index(self):
+        """Copy a memory-mapped index into memory so it can be modified and saved over its own file"""
+        if self._index_mmapped and self.index is not None:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        self._index_mmapped = False
     
-    def _extract_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from PDF file"""
+    def _refresh_gpu_index(self):
+        """Mirror the index onto GPU when one is available and the corpus is large"""
+        self._gpu_index = None
+        
+        if self.index is None or self.index.ntotal < GPU_MIN_VECTORS:
+            return
+        if not hasattr(faiss, "get_num_gpus") or faiss.get_num_gpus() == 0:
+            return
+        
         try:
-            reader = PdfReader(pdf_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-            return text
+            if self._gpu_resources is None:
+                self._gpu_resources = faiss.StandardGpuResources()
+            self._gpu_index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, self.index)
+            logger.info("🚀 Vector index mirrored to GPU (%s vectors)", self.index.ntotal)
         except Exception as e:
-            return f"Error reading PDF: {str(e)}"
+            logger.warning("⚠️ GPU index unavailable, searching on CPU: %s", e)
+            self._gpu_index = None
     
-    def _extract_from_docx(self, docx_path: str) -> str:
-        """Extract text from DOCX file"""
+    def _load_encoder(self):
+        """Load an int8-quantized ONNX MiniLM encoder, falling back to SentenceTransformer"""
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            from transformers import AutoTokenizer
+            import onnxruntime as ort
+        except ImportError:
+            logger.warning("⚠️ optimum[onnxruntime] not installed - using FP32 SentenceTransformer encoder")
+            self._model = SentenceTransformer(MODEL_NAME)
+            return
+        
         try:
-            text = docx2txt.process(docx_path)
-            return text
+            onnx_dir = os.path.join(self.vector_store_dir, ONNX_MODEL_DIR)
+            
+            # Export and quantize once, then reuse the saved model on later starts
+            if not os.path.exists(os.path.join(onnx_dir, ONNX_MODEL_FILE)):
+                logger.info("🔧 Exporting MiniLM to ONNX with dynamic int8 quantization...")
+                exported_model = ORTModelForFeatureExtraction.from_pretrained(MODEL_HUB_ID, export=True)
+                quantizer = ORTQuantizer.from_pretrained(exported_model)
+                quantization_config = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                quantizer.quantize(save_dir=onnx_dir, quantization_config=quantization_config)
+                AutoTokenizer.from_pretrained(MODEL_HUB_ID).save_pretrained(onnx_dir)
+            
+            # Apply every graph fusion ONNX Runtime has (attention, GELU, layer norm)
+            session_options = ort.SessionOptions()
+            session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            
+            self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+            self.onnx_model = ORTModelForFeatureExtraction.from_pretrained(
+                onnx_dir,
+                file_name=ONNX_MODEL_FILE,
+                provider="CPUExecutionProvider",
+                session_options=session_options
+            )
+            logger.info("⚡ Loaded int8 ONNX MiniLM encoder")
+            
         except Exception as e:
-            return f"Error reading DOCX: {str(e)}"
+            logger.warning("❌ Error loading ONNX encoder, using SentenceTransformer: %s", e)
+            self.tokenizer = None
+            self.onnx_model = None
+            self._model = SentenceTransformer(MODEL_NAME)
+    
+    @property
+    def model(self):
+        """SentenceTransformer encoder, loaded on first use (None when the ONNX encoder is active)"""
+        self._ensure_encoder()
+        return self._model
+    
+    def _ensure_encoder(self):
+        """Load the embedding model (int8 ONNX when available, FP32 otherwise) the first time it is needed"""
+        if self._encoder_loaded:
+            return
+        with self._encoder_lock:
+            if not self._encoder_loaded:
+                self._load_encoder()
+                self._encoder_loaded = True
+    
+    def warm(self):
+        """Load the encoder and run one inference so the first search does not wait for it"""
+        self._encode(["warmup"])
+    
+    def _get_tokenizer(self):
+        """Get the tokenizer backing the active encoder"""
+        self._ensure_encoder()
+        return self.tokenizer if self.onnx_model is not None else self.model.tokenizer
+    
+    def _encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts into L2-normalized float32 embeddings"""
+        if len(texts) <= 1:
+            return self._encode_batches(texts, batch_size)
+        
+        # Smart batching: group texts of similar token length so batches pad less
+        lengths = self._get_tokenizer()(
+            texts,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_length=True
+        )["length"]
+        order = np.argsort(lengths, kind="stable")
+        
+        sorted_embeddings = self._encode_batches([texts[i] for i in order], batch_size)
+        
+        # Restore the caller's order
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+        return embeddings
     
-    def _extract_from_txt(self, txt_path: str) -> str:
-        """Extract text from TXT file"""
+    def _encode_batches(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Run the encoder over texts in fixed-size batches"""
+        self._ensure_encoder()
+        if self.onnx_model is None:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        # Write pooled batches straight into one preallocated buffer instead of stacking copies
+        embeddings = None
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                pad_to_multiple_of=SEQ_PAD_MULTIPLE,
+                return_tensors="np"
+            )
+            token_embeddings = self.onnx_model(**inputs).last_hidden_state
+            
+            # Mean-pool token embeddings, ignoring padding
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            
+            if embeddings is None:
+                embeddings = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            embeddings[start:start + len(pooled)] = pooled
+        
+        if embeddings is None:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    def _encode_query_bytes(self, query: str) -> bytes:
+        """Encode a search query; returned as bytes so cached embeddings stay immutable"""
+        return self._encode([query]).tobytes()
+    
+    def _chunk_text(self, cv_text: str, stride: int = CHUNK_STRIDE, size: int = CHUNK_SIZE) -> List[str]:
+        """Split text into overlapping token windows so nothing past the model's limit is dropped"""
+        offsets = self._get_tokenizer()(
+            cv_text,
+            add_special_tokens=False,
+            return_offsets_mapping=True
+        )["offset_mapping"]
+        
+        if len(offsets) <= size:
+            return [cv_text]
+        
+        chunks = []
+        for start in range(0, len(offsets), stride):
+            window = offsets[start:start + size]
+            chunks.append(cv_text[window[0][0]:window[-1][1]])
+            if start + size >= len(offsets):
+                break
+        
+        return chunks
+    
+    def _embed_documents(self, cv_texts: List[str]) -> np.ndarray:
+        """Embed each CV as the mean of its chunk embeddings"""
+        flat_chunks = []
+        owner = []
+        for i, cv_text in enumerate(cv_texts):
+            chunks = self._chunk_text(cv_text)
+            flat_chunks.extend(chunks)
+            owner.extend([i] * len(chunks))
+        
+        # Encode every chunk of every CV in one batched pass
+        chunk_embeddings = self._encode(flat_chunks, batch_size=ENCODE_BATCH_SIZE)
+        del flat_chunks
+        
+        owner = np.asarray(owner)
+        embeddings = np.zeros((len(cv_texts), chunk_embeddings.shape[1]), dtype=np.float32)
+        np.add.at(embeddings, owner, chunk_embeddings)
+        embeddings /= np.bincount(owner, minlength=len(cv_texts))[:, None]
+        
+        return self._normalize_embeddings(embeddings)
+    
+    def _create_index(self, dimension: int, num_vectors: int):
+        """Create a cosine-similarity index sized for the corpus"""
+        # Vectors are stored as FP16, halving memory bandwidth with negligible recall loss
+        if num_vectors < HNSW_MIN_VECTORS:
+            base_index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        else:
+            base_index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            base_index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            base_index.hnsw.efSearch = HNSW_EF_SEARCH
+        
+        # Map vectors to database ids so single candidates can be removed
+        return faiss.IndexIDMap2(base_index)
+    
+    def _normalize_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
+        """L2-normalize embeddings in place so inner product equals cosine similarity"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+    
+    def extract_text_from_file(self, file_path: str, file_hash: str = None) -> str:
+        """Extract text from various file formats"""
         try:
-            with open(txt_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            cached = self._cached_text(file_hash or self._file_hash(file_path))
+            if cached is not None:
+                return cached
+            
+            return _extract_static(file_path)
+                
         except Exception as e:
-            return f"Error reading TXT: {str(e)}"
+            return f"Error reading file: {str(e)}"
     
     def _extract_cv_information(self, cv_text: str) -> Dict[str, Any]:
         """Extract key information from CV text"""
@@ -476,27 +971,23 @@ class ATSTools:
                 "contact_info": {}
             }
             
-            # Extract skills
-            skill_patterns = [
-                r'\b(?:Java|Python|JavaScript|React|Angular|Vue|Node\.js|Spring|Django|Flask)\b',
-                r'\b(?:AWS|Azure|Docker|Kubernetes|Git|Jenkins|MySQL|PostgreSQL|MongoDB)\b',
-                r'\b(?:HTML|CSS|TypeScript|jQuery|Bootstrap)\b'
-            ]
-            
-            for pattern in skill_patterns:
-                matches = re.findall(pattern, cv_text, re.IGNORECASE)
-                info["skills"].extend([match.lower() for match in matches])
+            # Single Hyperscan pass finds skills and which other patterns can match at all;
+            # its \b, \d and \s are ASCII-only, so other text keeps the re semantics
+            if HS_DB is not None and cv_text.isascii():
+                skill_matches, hit_ids = _hyperscan_cv_text(cv_text)
+                active = {pattern for pattern_id, pattern in enumerate(HS_PREFILTER_RES, start=1) if pattern_id in hit_ids}
+            else:
+                skill_matches = SKILL_RE.findall(cv_text)
+                active = set(HS_PREFILTER_RES)
             
-            info["skills"] = list(set(info["skills"]))
+            # Extract skills
+            info["skills"] = list({match.lower() for match in skill_matches})
             
             # Extract experience years
-            exp_patterns = [
-                r'(\d+)\+?\s*years?\s*(?:of\s*)?experience',
-                r'experience[:\s]*(\d+)\+?\s*years?'
-            ]
-            
-            for pattern in exp_patterns:
-                matches = re.findall(pattern, cv_text, re.IGNORECASE)
+            for pattern in EXPERIENCE_RES:
+                if pattern not in active:
+                    continue
+                matches = pattern.findall(cv_text)
                 if matches:
                     years = [int(match) for match in matches if match.isdigit()]
                     if years:
@@ -504,31 +995,23 @@ class ATSTools:
                         break
             
             # Extract education
-            edu_patterns = [
-                r'(?:Bachelor|Master|PhD|BSc|MSc)[^.]*',
-                r'University[^.]*'
-            ]
-            
-            for pattern in edu_patterns:
-                matches = re.findall(pattern, cv_text, re.IGNORECASE)
-                info["education"].extend(matches)
+            for pattern in EDUCATION_RES:
+                if pattern in active:
+                    info["education"].extend(pattern.findall(cv_text))
             
             # Extract contact info
-            email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-            phone_pattern = r'\+?[\d\s\-\(\)]{10,}'
-            
-            emails = re.findall(email_pattern, cv_text)
-            phones = re.findall(phone_pattern, cv_text)
+            email_match = EMAIL_RE.search(cv_text) if EMAIL_RE in active else None
+            phone_match = PHONE_RE.search(cv_text) if PHONE_RE in active else None
             
-            if emails:
-                info["contact_info"]["email"] = emails[0]
-            if phones:
-                info["contact_info"]["phone"] = phones[0].strip()
+            if email_match:
+                info["contact_info"]["email"] = email_match.group()
+            if phone_match:
+                info["contact_info"]["phone"] = phone_match.group().strip()
             
             return info
             
         except Exception as e:
-            print(f"❌ Error extracting CV information: {e}")
+            logger.error("❌ Error extracting CV information: %s", e)
             return {
                 "skills": [],
                 "experience_years": 0,
@@ -536,29 +1019,117 @@ class ATSTools:
                 "contact_info": {}
             }
     
+    def _file_hash(self, file_path: str) -> str:
+        """Hash file contents so renamed or re-uploaded copies share cache entries"""
+        with open(file_path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    
+    def _embedding_key(self) -> str:
+        """Identify the encoder and chunking behind an embedding, so vectors from other settings are never mixed"""
+        self._ensure_encoder()
+        encoder = f"onnx-int8:{MODEL_HUB_ID}" if self.onnx_model is not None else f"st-fp32:{MODEL_NAME}"
+        return f"{encoder}|seq={MAX_SEQ_LENGTH}|chunk={CHUNK_SIZE}/{CHUNK_STRIDE}|pool=mean"
+    
+    def _drop_legacy_extract_cache(self):
+        """Remove the old single-file cache, whose embeddings do not record the encoder that made them"""
+        legacy_path = os.path.join(self.vector_store_dir, LEGACY_EXTRACT_CACHE_FILE)
+        try:
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+                logger.info("♻️ Removed legacy extraction cache")
+        except OSError as e:
+            logger.warning("⚠️ Could not remove legacy extraction cache: %s", e)
+    
+    def _load_cache_entry(self, file_hash: str) -> Dict[str, Any]:
+        """Load one cached extraction (not portable across machines or library versions)"""
+        try:
+            with open(os.path.join(self._cache_dir, f"{file_hash}.pkl"), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("⚠️ Ignoring unreadable extraction cache entry %s: %s", file_hash, e)
+            return None
+    
+    def _cached_text(self, file_hash: str) -> str:
+        """Cached extracted text for a file, or None"""
+        entry = self._load_cache_entry(file_hash)
+        return entry["cv_text"] if entry else None
+    
+    def _cached_embedding(self, file_hash: str, embedding_key: str) -> np.ndarray:
+        """Cached embedding for a file, or None if it is missing or came from other encoder settings"""
+        entry = self._load_cache_entry(file_hash)
+        if entry and entry.get("embedding_key") == embedding_key:
+            return entry["embedding"]
+        return None
+    
+    def _save_cache_entries(self, entries: Dict[str, Dict[str, Any]]):
+        """Write each new cache entry to its own file, then evict the oldest beyond the size cap"""
+        if not entries:
+            return
+        
+        try:
+            for file_hash, entry in entries.items():
+                entry_path = os.path.join(self._cache_dir, f"{file_hash}.pkl")
+                temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, entry_path)
+            
+            with os.scandir(self._cache_dir) as cache_entries:
+                cached = [(entry.stat().st_mtime, entry.path) for entry in cache_entries if entry.name.endswith(".pkl")]
+            for _, entry_path in sorted(cached)[:max(0, len(cached) - EXTRACT_CACHE_MAX_ENTRIES)]:
+                os.remove(entry_path)
+        except Exception as e:
+            logger.error("❌ Error saving extraction cache: %s", e)
+    
     def _save_index(self):
         """Save vector index and metadata"""
         try:
             if self.index is not None:
-                faiss.write_index(self.index, os.path.join(self.vector_store_dir, "cv_index.faiss"))
-                with open(os.path.join(self.vector_store_dir, "metadata.pkl"), "wb") as f:
-                    pickle.dump(self.cv_metadata, f)
-                print("💾 Vector index saved")
+                metadata = {
+                    "version": INDEX_FORMAT_VERSION,
+                    "candidates": list(self.cv_metadata.values())
+                }
+                faiss.write_index(self.index, os.path.join(self.vector_store_dir, INDEX_FILE))
+                with open(os.path.join(self.vector_store_dir, METADATA_FILE), "wb") as f:
+                    f.write(msgpack.packb(metadata, use_bin_type=True))
+                # Older stores also kept a padded copy of every CV text that nothing read back
+                legacy_texts_path = os.path.join(self.vector_store_dir, LEGACY_CV_TEXTS_FILE)
+                if os.path.exists(legacy_texts_path):
+                    os.remove(legacy_texts_path)
+                logger.info("💾 Vector index saved")
         except Exception as e:
-            print(f"❌ Error saving index: {e}")
+            logger.error("❌ Error saving index: %s", e)
     
     def _load_index(self):
         """Load existing vector index and metadata"""
         try:
-            index_path = os.path.join(self.vector_store_dir, "cv_index.faiss")
-            metadata_path = os.path.join(self.vector_store_dir, "metadata.pkl")
+            index_path = os.path.join(self.vector_store_dir, INDEX_FILE)
+            metadata_path = os.path.join(self.vector_store_dir, METADATA_FILE)
             
             if os.path.exists(index_path) and os.path.exists(metadata_path):
-                self.index = faiss.read_index(index_path)
                 with open(metadata_path, "rb") as f:
-                    self.cv_metadata = pickle.load(f)
-                print(f"💾 Loaded vector index with {len(self.cv_metadata)} candidates")
+                    metadata = msgpack.unpackb(f.read(), raw=False)
+                
+                # Older stores used positional ids or raw L2 distance - rebuild them
+                if not isinstance(metadata, dict) or metadata.get("version") != INDEX_FORMAT_VERSION:
+                    logger.warning("♻️ Stored vector index uses an outdated format - rebuilding from database")
+                    return
+                
+                # Map the index file so pages load on demand; it is copied into memory before any change
+                try:
+                    self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                    self._index_mmapped = True
+                except RuntimeError:
+                    self.index = faiss.read_index(index_path)
+                    self._index_mmapped = False
+                self.cv_metadata = {meta["vector_id"]: meta for meta in metadata["candidates"]}
+                logger.info("💾 Loaded vector index with %s candidates", len(self.cv_metadata))
+                
+                self._refresh_gpu_index()
         except Exception as e:
-            print(f"❌ Error loading index: {e}")
+            logger.error("❌ Error loading index: %s", e)
             self.index = None
-            self.cv_metadata = []
\ No newline at end of file
+            self._index_mmapped = False
+            self.cv_metadata = {}
@@ -1,485 +1,94 @@
-from typing import Dict, Any, List, TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.schema import HumanMessage, SystemMessage
+from typing import Dict, Any, List, Literal, Optional, TYPE_CHECKING
+from dataclasses import dataclass, field
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
-import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
-from agents.ats_tools import ATSTools
-from agents.payroll_tools import PayrollTools
-
-# State definition for LangGraph
-class AgentState(TypedDict):
-    messages: List[Dict[str, str]]
-    user_query: str
-    user_context: Dict[str, Any]
-    intent: str
-    tool_result: Dict[str, Any]
-    final_response: str
-    permission_granted: bool
-    denied_reason: str
+from langgraph.types import Command
+from langchain_core.runnables import RunnableConfig
+from collections import OrderedDict
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import re
 
-class HRAgent:
-    def __init__(self, google_api_key: str, data_dir: str):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            google_api_key=google_api_key,
-            temperature=0.3
-        )
-        
-        print("🤖 Initializing HR Agent...")
-        
-        # Initialize tools
-        self.ats_tools = ATSTools(data_dir)
-        self.payroll_tools = PayrollTools(data_dir)
-        
-        # Build the graph
-        self.graph = self._build_graph()
-        
-        print("✅ HR Agent fully initialized with LangGraph workflow")
-    
-    def _build_graph(self) -> CompiledStateGraph:
-        """Build the LangGraph workflow"""
-        workflow = StateGraph(AgentState)
-        
-        # Add nodes
-        workflow.add_node("check_permissions", self._check_permissions)
-        workflow.add_node("classify_intent", self._classify_intent)
-        workflow.add_node("handle_ats", self._handle_ats)
-        workflow.add_node("handle_payroll", self._handle_payroll)
-        workflow.add_node("generate_response", self._generate_response)
-        workflow.add_node("access_denied", self._access_denied)
-        
-        # Add edges
-        workflow.set_entry_point("check_permissions")
-        workflow.add_conditional_edges(
-            "check_permissions",
-            self._permission_router,
-            {
-                "allowed": "classify_intent",
-                "denied": "access_denied"
-            }
-        )
-        workflow.add_conditional_edges(
-            "classify_intent",
-            self._route_based_on_intent,
-            {
-                "ats": "handle_ats",
-                "payroll": "handle_payroll",
-                "general": "generate_response"
-            }
-        )
-        workflow.add_edge("handle_ats", "generate_response")
-        workflow.add_edge("handle_payroll", "generate_response")
-        workflow.add_edge("generate_response", END)
-        workflow.add_edge("access_denied", END)
-        
-        return workflow.compile()
-    
-    def _extract_employee_id_or_name(self, query: str) -> str:
-        """Extract employee ID or name from query - ENHANCED VERSION"""
-        import re
-        
-        print(f"🔍 Extracting identifier from query: '{query}'")
-        
-        # First, try to extract employee ID patterns like EMP001, EMP014, ADM001
-        emp_id_match = re.search(r'(EMP\d{3}|ADM\d{3})', query.upper())
-        if emp_id_match:
-            extracted_id = emp_id_match.group()
-            print(f"✅ Extracted employee ID: {extracted_id}")
-            return extracted_id
-        
-        # If no ID found, try to extract name with enhanced patterns
-        name_patterns = [
-            # Pattern 1: "salary for John Doe"
-            r'(?:salary for|calculate salary for|payroll for|salary of)\s+([A-Za-z\s]+?)(?:\s*$|[?.!,])',
-            # Pattern 2: "for John Doe Smith"  
-            r'(?:for)\s+([A-Za-z]+(?:\s+[A-Za-z]+){1,2})(?:\s|$)',
-            # Pattern 3: "John Doe" (2-3 words)
-            r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,2})\b',
-            # Pattern 4: Any sequence of 2+ capitalized words
-            r'\b([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\b'
-        ]
-        
-        # Words to exclude from name extraction
-        excluded_words = {
-            'salary', 'for', 'calculate', 'payroll', 'employee', 'the', 'a', 'an', 
-            'my', 'me', 'show', 'get', 'help', 'with', 'details', 'information',
-            'smith', 'john', 'jane', 'doe'  # Common test names
-        }
-        
-        for i, pattern in enumerate(name_patterns):
-            matches = re.findall(pattern, query, re.IGNORECASE)
-            print(f"🔍 Pattern {i+1} matches: {matches}")
-            
-            for match in matches:
-                if isinstance(match, tuple):
-                    match = match[0]  # Take first group if tuple
-                
-                extracted_name = match.strip()
-                
-                # Clean the extracted name
-                name_words = extracted_name.lower().split()
-                clean_words = [word for word in name_words if word not in excluded_words and len(word) > 1]
-                
-                if len(clean_words) >= 1:  # At least 1 valid word
-                    clean_name = ' '.join(clean_words).title()
-                    if len(clean_name) > 2:  # At least 3 characters
-                        print(f"✅ Extracted employee name: '{clean_name}' (from pattern {i+1})")
-                        return clean_name
-        
-        # If no good pattern match, look for any capitalized words that might be names
-        words = query.split()
-        potential_names = []
-        
-        for word in words:
-            cleaned_word = re.sub(r'[^\w]', '', word)  # Remove punctuation
-            if (len(cleaned_word) > 2 and 
-                cleaned_word[0].isupper() and 
-                cleaned_word.lower() not in excluded_words):
-                potential_names.append(cleaned_word)
-        
-        if len(potential_names) >= 2:
-            combined_name = ' '.join(potential_names[:3])  # Max 3 words
-            print(f"✅ Extracted potential name from words: '{combined_name}'")
-            return combined_name
-        
-        print(f"❌ No employee ID or name extracted from: '{query}'")
-        return None
-        
-    def _check_permissions(self, state: AgentState) -> AgentState:
-        """Check user permissions - FIXED VERSION"""
-        user_role = state["user_context"].get('role', 'user')
-        user_employee_id = state["user_context"].get('employee_id')
-        query = state["user_query"].lower()
-    
-        print(f"🔐 Checking permissions for {user_role} (ID: {user_employee_id}): '{query}'")
-    
-        # Admin can do everything
-        if user_role == 'admin':
-            state["permission_granted"] = True
-            print("✅ Admin access granted")
-            return state
-    
-        # User role restrictions
-        if user_role == 'user':
-            # Check if trying to access ATS functions
-            ats_keywords = ['search', 'candidate', 'cv', 'applicant', 'hire', 'recruit']
-            if any(keyword in query for keyword in ats_keywords):
-                state["permission_granted"] = False
-                state["denied_reason"] = "ATS access is restricted to HR Admin users only."
-                print("❌ ATS access denied for regular user")
-                return state
-        
-            # Check payroll access - FIXED LOGIC
-            payroll_keywords = ['salary', 'payroll', 'calculate']
-            if any(keyword in query for keyword in payroll_keywords):
-                # Extract employee identifier from query
-                extracted_identifier = self._extract_employee_id_or_name(query)
-            
-                print(f"🔍 Extracted identifier: '{extracted_identifier}', User ID: '{user_employee_id}'")
-            
-                # Allow access if:
-                # 1. No specific employee mentioned (general payroll query)
-                # 2. User's own employee ID is mentioned
-                # 3. User's own name is mentioned (partial match)
-                if extracted_identifier:
-                    user_name = state["user_context"].get('name', '')
-                
-                    # Check if it matches user's employee ID
-                    if extracted_identifier.upper() == user_employee_id:
-                        print("✅ User accessing own employee ID")
-                        state["permission_granted"] = True
-                        return state
-                
-                    # Check if it matches user's name (case insensitive)
-                    if user_name and extracted_identifier.lower() in user_name.lower():
-                        print("✅ User accessing own name")
-                        state["permission_granted"] = True
-                        return state
-                
-                    # Check if extracted name matches user name (reverse)
-                    if user_name and user_name.lower() in extracted_identifier.lower():
-                        print("✅ User name matches extracted identifier")
-                        state["permission_granted"] = True
-                        return state
-                
-                    # If none match, deny access
-                    state["permission_granted"] = False
-                    state["denied_reason"] = f"You can only access your own payroll information. Use your Employee ID '{user_employee_id}' or your name '{user_name}'."
-                    print(f"❌ Payroll access denied - '{extracted_identifier}' doesn't match user '{user_employee_id}' or '{user_name}'")
-                    return state
-                else:
-                    # No specific employee mentioned - allow general payroll queries
-                    print("✅ General payroll query allowed")
-                    state["permission_granted"] = True
-                    return state
-        
-        # Check if trying to access other admin functions
-        admin_keywords = ['all employees', 'list employees', 'payroll report', 'generate report']
-        if any(keyword in query for keyword in admin_keywords):
-            state["permission_granted"] = False
-            state["denied_reason"] = "This function is available to HR Admin only."
-            print("❌ Admin function access denied for regular user")
-            return state
-    
-        # Allow all other queries
-        state["permission_granted"] = True
-        print("✅ Permission granted")
-        return state
-    
-    def _permission_router(self, state: AgentState) -> str:
-        """Route based on permission check"""
-        return "allowed" if state["permission_granted"] else "denied"
-    
-    def _access_denied(self, state: AgentState) -> AgentState:
-        """Handle access denied cases"""
-        user_role = state["user_context"].get('role', 'user')
-        user_name = state["user_context"].get('name', 'User')
-        
-        state["final_response"] = f"""
-🚫 Access Denied
+from .ats_tools import ATSTools
+from .payroll_tools import PayrollTools
 
-Hello {user_name}, {state["denied_reason"]}
+if TYPE_CHECKING:
+    from langchain_google_genai import ChatGoogleGenerativeAI
 
-As a regular user, you can:
-• Check your own salary: "Calculate salary for {state["user_context"].get('employee_id')}"
-• Ask general questions about HR policies
-• Get help with the system
+logger = logging.getLogger(__name__)
 
-For candidate management and ATS functions, please contact your HR Admin.
-"""
-        return state
-    
-    def _classify_intent(self, state: AgentState) -> AgentState:
-        """Classify user intent"""
-        try:
-            query = state["user_query"].lower()
-            print(f"🧠 Classifying intent for: '{query}'")
-            
-            # Simple rule-based classification
-            if any(keyword in query for keyword in ['search', 'candidate', 'cv', 'applicant', 'hire', 'recruit']):
-                intent = "ats"
-            elif any(keyword in query for keyword in ['salary', 'payroll', 'calculate', 'employee', 'report']):
-                intent = "payroll"
-            else:
-                intent = "general"
-            
-            state["intent"] = intent
-            print(f"🎯 Intent classified as: {intent}")
-            return state
-            
-        except Exception as e:
-            print(f"❌ Error classifying intent: {e}")
-            state["intent"] = "general"
-            return state
-    
-    def _route_based_on_intent(self, state: AgentState) -> str:
-        """Route based on classified intent"""
-        return state["intent"]
-    
-    def _handle_ats(self, state: AgentState) -> AgentState:
-        """Handle ATS related tasks"""
-        try:
-            query = state["user_query"].lower()
-            print(f"📋 Handling ATS request: '{query}'")
-            
-            if "search" in query or "find" in query:
-                search_terms = self._extract_search_terms(state["user_query"])
-                print(f"🔍 Searching for: '{search_terms}'")
-                results = self.ats_tools.search_candidates(search_terms)
-                state["tool_result"] = {"type": "candidate_search", "results": results}
-                
-            elif "all candidates" in query or "list candidates" in query:
-                print("📋 Getting all candidates")
-                results = self.ats_tools.get_all_candidates()
-                state["tool_result"] = {"type": "all_candidates", "results": results}
-                
-            else:
-                state["tool_result"] = {
-                    "type": "ats_help",
-                    "message": "I can help you with: searching candidates, viewing all candidates, or managing CV applications."
-                }
-            
-        except Exception as e:
-            print(f"❌ ATS error: {e}")
-            state["tool_result"] = {"type": "error", "message": f"ATS error: {str(e)}"}
-        
-        return state
-    
-    def _handle_payroll(self, state: AgentState) -> AgentState:
-        """Handle payroll related tasks - ENHANCED WITH BETTER ERROR HANDLING"""
-        try:
-            query = state["user_query"].lower()
-            user_role = state["user_context"].get('role', 'user')
-            user_employee_id = state["user_context"].get('employee_id')
-            user_name = state["user_context"].get('name', '')
-            
-            print(f"💰 Handling payroll request: '{query}' for role: {user_role}")
-            print(f"👤 User context: ID={user_employee_id}, Name={user_name}")
-            
-            if "calculate salary" in query or "salary for" in query or "salary" in query or "payroll" in query:
-                emp_identifier = self._extract_employee_id_or_name(state["user_query"])
-                print(f"💰 Extracted employee identifier: '{emp_identifier}'")
-                
-                # For non-admin users, enforce access control
-                if user_role != 'admin':
-                    print(f"🔒 Non-admin user access control check")
-                    
-                    # If no identifier extracted, use user's own data
-                    if not emp_identifier:
-                        emp_identifier = user_employee_id
-                        print(f"🔒 No identifier specified, using user's own ID: {emp_identifier}")
-                    else:
-                        # Check if the identifier matches the user
-                        identifier_matches_user = False
-                        
-                        # Check employee ID match
-                        if emp_identifier.upper() == user_employee_id:
-                            identifier_matches_user = True
-                            print(f"✅ Identifier matches user employee ID")
-                        
-                        # Check name match (case insensitive, partial)
-                        elif user_name:
-                            user_name_lower = user_name.lower()
-                            identifier_lower = emp_identifier.lower()
-                            
-                            if (identifier_lower in user_name_lower or 
-                                user_name_lower in identifier_lower or
-                                any(part in identifier_lower for part in user_name_lower.split()) or
-                                any(part in user_name_lower for part in identifier_lower.split())):
-                                identifier_matches_user = True
-                                print(f"✅ Identifier matches user name")
-                        
-                        if not identifier_matches_user:
-                            # Return access denied message instead of forcing
-                            state["tool_result"] = {
-                                "type": "error", 
-                                "message": f"Access denied. You can only access your own payroll information. Use '{user_employee_id}' or '{user_name}'"
-                            }
-                            return state
-                
-                # Proceed with salary calculation
-                if emp_identifier:
-                    print(f"💰 Proceeding with salary calculation for: '{emp_identifier}'")
-                    
-                    # Try the calculation
-                    try:
-                        result = self.payroll_tools.calculate_salary(emp_identifier)
-                        
-                        # Check if it's an access denied error for non-admin users
-                        if "error" in result and user_role != 'admin':
-                            # For regular users, if their identifier doesn't work, try their employee ID
-                            if emp_identifier != user_employee_id:
-                                print(f"🔄 Retrying with user's employee ID: {user_employee_id}")
-                                result = self.payroll_tools.calculate_salary(user_employee_id)
-                        
-                        state["tool_result"] = {"type": "salary_calculation", "result": result}
-                        
-                    except Exception as e:
-                        print(f"❌ Salary calculation failed: {e}")
-                        state["tool_result"] = {
-                            "type": "error", 
-                            "message": f"Error calculating salary: {str(e)}"
-                        }
-                else:
-                    state["tool_result"] = {
-                        "type": "error", 
-                        "message": f"Please specify your employee ID '{user_employee_id}' or use your name '{user_name}'"
-                    }
-            
-            elif "payroll report" in query or "generate report" in query or "report" in query:
-                if user_role == 'admin':
-                    department = self._extract_department(state["user_query"])
-                    print(f"📊 Generating payroll report for: {department or 'all departments'}")
-                    try:
-                        result = self.payroll_tools.generate_payroll_report(department)
-                        state["tool_result"] = {"type": "payroll_report", "result": result}
-                    except Exception as e:
-                        print(f"❌ Payroll report failed: {e}")
-                        state["tool_result"] = {"type": "error", "message": f"Error generating report: {str(e)}"}
-                else:
-                    state["tool_result"] = {"type": "error", "message": "Payroll reports are available to HR Admin only"}
-            
-            elif "all employees" in query or "list employees" in query or "show employees" in query:
-                if user_role == 'admin':
-                    print("👥 Getting all employees")
-                    try:
-                        results = self.payroll_tools.get_all_employees()
-                        if results and len(results) > 0 and "error" not in results[0]:
-                            state["tool_result"] = {"type": "all_employees", "results": results}
-                        else:
-                            error_msg = results[0].get("error", "No employees found") if results else "No employees found"
-                            state["tool_result"] = {"type": "error", "message": error_msg}
-                    except Exception as e:
-                        print(f"❌ Get all employees failed: {e}")
-                        state["tool_result"] = {"type": "error", "message": f"Error getting employees: {str(e)}"}
-                else:
-                    state["tool_result"] = {"type": "error", "message": "Employee list is available to HR Admin only"}
-            
-            elif "debug" in query and user_role == 'admin':
-                # Debug functionality for admin users
-                print("🔧 Running debug for admin user")
-                try:
-                    debug_info = self.payroll_tools.debug_employee_data()
-                    state["tool_result"] = {"type": "debug_info", "result": debug_info}
-                except Exception as e:
-                    state["tool_result"] = {"type": "error", "message": f"Debug failed: {str(e)}"}
-            
-            else:
-                # General payroll help
-                if user_role == 'admin':
-                    help_message = """I can help you with:
-    • "Calculate salary for [Employee ID or Name]"
-    • "Generate payroll report"
-    • "Show all employees"
-    • "Generate payroll report for [Department]"
-    """
-                else:
-                    help_message = f"""I can help you check your salary:
-    • "Calculate salary for {user_employee_id}"
-    • "Calculate salary for {user_name}"
-    • "Show my payroll details"
-    • "Calculate my salary"
-    """
-                
-                state["tool_result"] = {
-                    "type": "payroll_help",
-                    "message": help_message
-                }
-                
-        except Exception as e:
-            print(f"❌ Payroll handler error: {e}")
-            import traceback
-            traceback.print_exc()
-            state["tool_result"] = {"type": "error", "message": f"Payroll system error: {str(e)}"}
-        
-        return state
-    
-    def _generate_response(self, state: AgentState) -> AgentState:
-        """Generate final response"""
-        try:
-            user_name = state["user_context"].get('name', 'User')
-            user_role = state["user_context"].get('role', 'user')
-            
-            if state["intent"] == "general":
-                state["final_response"] = self._generate_general_response(state["user_query"], user_name, user_role)
-            else:
-                state["final_response"] = self._format_tool_result(state["tool_result"], user_role)
-        except Exception as e:
-            print(f"❌ Error generating response: {e}")
-            state["final_response"] = f"Error generating response: {str(e)}"
-        
-        return state
-    
-    def _generate_general_response(self, query: str, user_name: str, user_role: str) -> str:
-        """Generate context-aware general responses based on user role and query"""
-        query_lower = query.lower()
-        
-        if user_role == 'admin':
-            capabilities = """
+# Responses that depend only on the query wording and the user are reused for repeat questions
+RESPONSE_CACHE_SIZE = 1024
+CACHEABLE_RESULT_TYPES = {"ats_help", "payroll_help"}
+
+# Intent and permission decisions depend only on the query and the asking user, so repeats skip the checks
+DECISION_CACHE_SIZE = 1024
+
+# Intent keyword groups, matched against the query's word tokens by set intersection
+QUERY_TOKEN_RE = re.compile(r'\w+')
+INTENT_KEYWORDS = {
+    "ats": frozenset({
+        "search", "searches", "searched", "searching", "candidate", "candidates", "cv", "cvs",
+        "applicant", "applicants", "hire", "recruit", "recruits", "recruited", "recruiter",
+        "recruiters", "recruiting", "recruitment"
+    }),
+    "payroll_access": frozenset({
+        "salary", "salaries", "payroll", "payrolls", "calculate", "calculates", "calculated",
+        "calculating", "calculation", "calculations", "calculator"
+    }),
+    "payroll": frozenset({"employee", "employees", "report", "reports"}),
+}
+ALL_INTENT_KEYWORDS = frozenset().union(*INTENT_KEYWORDS.values())
+
+# Phrase patterns compiled once; word boundaries stop e.g. "list" matching inside "listing"
+# Searched against the already lower-cased query, so no case folding is needed
+ADMIN_KEYWORDS_RE = re.compile(r'\b(?:all employees|list employees|payroll report|generate report)\b')
+ATS_SEARCH_RE = re.compile(r'\b(?:search|find)\w*\b')
+ATS_LIST_RE = re.compile(r'\b(?:all|list) candidates\b')
+# Payroll sub-requests and general topics match as substrings of the lower-cased query, in priority order
+PAYROLL_SALARY_RE = re.compile(r'salary|payroll')
+PAYROLL_REPORT_RE = re.compile(r'report')
+PAYROLL_EMPLOYEES_RE = re.compile(r'(?:all|list|show) employees')
+PAYROLL_DEBUG_RE = re.compile(r'debug')
+GENERAL_TOPIC_PATTERNS = (
+    ("policies", re.compile(r'polic(?:y|ies)')),
+    ("procedures", re.compile(r'help|procedure|process')),
+    ("benefits", re.compile(r'benefit|allowance')),
+)
+# Department names recognised in payroll report requests, keyed by their lower-cased form
+DEPARTMENTS = {"it": "IT", "hr": "HR", "finance": "Finance", "marketing": "Marketing"}
+# Whole-word match, so "it" inside "with" or "marketing" is not taken for the IT department
+DEPARTMENT_RE = re.compile(r'\b(' + '|'.join(DEPARTMENTS) + r')\b')
+SEARCH_STOP_WORDS = frozenset({"search", "for", "find", "candidates", "candidate", "who", "with", "have", "are"})
+EMP_ID_RE = re.compile(r'(EMP\d{3}|ADM\d{3})', re.IGNORECASE)
+
+# Name extraction patterns, tried in order until one yields a usable name. Each is paired with
+# the literals it cannot match without, so a cheap substring test skips the regex on most queries
+NAME_PATTERNS = [
+    # Pattern 1: "salary for John Doe"
+    # (the name must start with a letter and is bounded by a lookahead, so whitespace runs cannot backtrack)
+    (("salary", "payroll"), re.compile(r'(?:salary for|payroll for|salary of)\s+([A-Za-z][A-Za-z\s]*)(?=[?.!,]|$)', re.IGNORECASE)),
+    # Pattern 2: "for John Doe Smith"
+    (("for",), re.compile(r'(?:for)\s+([A-Za-z]+(?:\s+[A-Za-z]+){1,2})(?:\s|$)', re.IGNORECASE)),
+    # Pattern 3: "John Doe" (2-3 words); this also covers any run of 2-3 capitalized words
+    ((), re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,2})\b', re.IGNORECASE)),
+]
+NON_WORD_RE = re.compile(r'[^\w]')
+
+# Words to exclude from name extraction
+NAME_EXCLUDED_WORDS = frozenset({
+    'salary', 'for', 'calculate', 'payroll', 'employee', 'the', 'a', 'an',
+    'my', 'me', 'show', 'get', 'help', 'with', 'details', 'information',
+    'smith', 'john', 'jane', 'doe'  # Common test names
+})
+
+# Independent tool calls (e.g. several salaries in one query) run concurrently, capped to spare the database
+TOOL_MAX_WORKERS = 8
+
+# Admins all see the same capability summary
+ADMIN_CAPABILITIES = """
     🎯 As an HR Admin, you have full access to:
 
     **🔍 Candidate Management (ATS):**
@@ -497,12 +106,24 @@ For candidate management and ATS functions, please contact your HR Admin.
     • Upload candidate CVs
     • Manage employee data
     """
-            return f"👋 Hello {user_name}!\n\n{capabilities}\n\nHow can I help you today?"
-        
-        else:
-            # User-specific responses based on query context
-            if any(keyword in query_lower for keyword in ['policy', 'policies', 'company policy']):
-                return f"""
+
+# Built once at import; filled per denial with the user's name, id and the denial reason
+ACCESS_DENIED_TEMPLATE = """
+🚫 Access Denied
+
+Hello {user_name}, {denied_reason}
+
+As a regular user, you can:
+• Check your own salary: "Calculate salary for {employee_id}"
+• Ask general questions about HR policies
+• Get help with the system
+
+For candidate management and ATS functions, please contact your HR Admin.
+"""
+
+# General responses for non-admin users per topic; only the user's name is filled in
+USER_GENERAL_RESPONSES = {
+    "policies": """
     📋 **Company HR Policies - {user_name}**
 
     **🏢 Work Policies:**
@@ -527,10 +148,8 @@ For candidate management and ATS functions, please contact your HR Admin.
     • Office Hours: 9:00 AM - 5:00 PM
 
     Need specific policy details? Feel free to ask!
-    """
-            
-            elif any(keyword in query_lower for keyword in ['help', 'procedure', 'procedures', 'process']):
-                return f"""
+    """,
+    "procedures": """
     🛠️ **HR Procedures & Help - {user_name}**
 
     **💰 Payroll Procedures:**
@@ -561,10 +180,8 @@ For candidate management and ATS functions, please contact your HR Admin.
     • Document Requests: Contact HR
 
     Need help with a specific procedure? Just ask!
-    """
-            
-            elif any(keyword in query_lower for keyword in ['benefit', 'benefits', 'allowance', 'allowances']):
-                return f"""
+    """,
+    "benefits": """
     💎 **Employee Benefits & Allowances - {user_name}**
 
     **💰 Financial Benefits:**
@@ -598,12 +215,8 @@ For candidate management and ATS functions, please contact your HR Admin.
     • Free Parking
 
     Want details about any specific benefit? Just ask!
-    """
-            
-            else:
-                # Default user capabilities
-                user_emp_id = user_name.split()[-1] if user_name else "your employee ID"
-                return f"""
+    """,
+    "default": """
     👋 **Hello {user_name}! Welcome to HR Assistant**
 
     🎯 **What I can help you with:**
@@ -627,57 +240,626 @@ For candidate management and ATS functions, please contact your HR Admin.
     **🚫 Note:** For candidate management and other employees' salary information, please contact HR Admin.
 
     How can I help you today?
+    """,
+}
+
+# Payroll help shown when a payroll query names no specific task
+PAYROLL_HELP_ADMIN = """I can help you with:
+    • "Calculate salary for [Employee ID or Name]"
+    • "Generate payroll report"
+    • "Show all employees"
+    • "Generate payroll report for [Department]"
+    """
+PAYROLL_HELP_USER_TEMPLATE = """I can help you check your salary:
+    • "Calculate salary for {employee_id}"
+    • "Calculate salary for {user_name}"
+    • "Show my payroll details"
+    • "Calculate my salary"
     """
+
+@functools.lru_cache(maxsize=8)
+def _get_llm(api_key: str, temperature: float) -> "ChatGoogleGenerativeAI":
+    """Gemini chat client shared by every agent using the same key, so connections are reused"""
+    # Imported here so sessions that never reach the LLM skip loading the Gemini SDK
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-pro",
+        google_api_key=api_key,
+        temperature=temperature
+    )
+
+@functools.lru_cache(maxsize=4)
+def _get_ats_tools(data_dir: str) -> ATSTools:
+    """ATS tools shared by every agent on the same data directory, so the index and encoder load once"""
+    return ATSTools(data_dir)
+
+@functools.lru_cache(maxsize=4)
+def _get_payroll_tools(data_dir: str) -> PayrollTools:
+    """Payroll tools shared by every agent on the same data directory"""
+    return PayrollTools(data_dir)
+
+# State definition for LangGraph; slots give nodes attribute access without a per-state __dict__
+@dataclass(slots=True)
+class AgentState:
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    user_query: str = ""
+    query_lower: str = ""
+    query_tokens: frozenset = frozenset()
+    user_context: Dict[str, Any] = field(default_factory=dict)
+    # The user_context fields nodes read, unpacked once per turn
+    user_role: str = "user"
+    user_employee_id: Optional[str] = None
+    user_name: str = ""
+    intent: str = ""
+    tool_result: Dict[str, Any] = field(default_factory=dict)
+    final_response: str = ""
+    permission_granted: bool = False
+    denied_reason: str = ""
+
+class HRAgent:
+    # The workflow topology is the same for every agent, so it is compiled once at import (see below the class)
+    _COMPILED_GRAPH: CompiledStateGraph = None
     
-    def _format_tool_result(self, tool_result: Dict[str, Any], user_role: str) -> str:
-        """Format tool results for display"""
-        result_type = tool_result.get("type", "unknown")
+    # Node each routing outcome of classify_and_check continues at
+    _ROUTES = {
+        "ats": "handle_ats",
+        "payroll": "handle_payroll",
+        "general": "generate_response",
+        "denied": "access_denied"
+    }
+    
+    def __init__(self, google_api_key: str, data_dir: str):
+        self._google_api_key = google_api_key
+        self._llm = None
+        self._llm_lock = threading.Lock()
+        
+        logger.info("🤖 Initializing HR Agent...")
+        
+        # Initialize tools
+        self.ats_tools = _get_ats_tools(data_dir)
+        self.payroll_tools = _get_payroll_tools(data_dir)
+        self._tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS)
+        
+        # Permission rule per (role, intent); other roles only face the admin-function check
+        self._permission_rules = {
+            ("admin", "ats"): self._allow,
+            ("admin", "payroll"): self._allow,
+            ("admin", "general"): self._allow,
+            ("user", "ats"): self._deny_ats,
+            ("user", "payroll"): self._check_user_payroll_access,
+            ("user", "general"): self._allow,
+        }
+        
+        # Payroll sub-request handlers in priority order; the first whose pattern matches answers
+        self._payroll_handlers = (
+            (PAYROLL_SALARY_RE, self._payroll_salary),
+            (PAYROLL_REPORT_RE, self._payroll_report),
+            (PAYROLL_EMPLOYEES_RE, self._payroll_employees),
+            (PAYROLL_DEBUG_RE, self._payroll_debug),
+        )
+        
+        # Formatter per tool result type
+        self._formatters = {
+            "candidate_search": self._fmt_candidate_search,
+            "all_candidates": self._fmt_all_candidates,
+            "salary_calculation": self._fmt_salary_calculation,
+            "salary_calculations": self._fmt_salary_calculations,
+            "combined": self._fmt_combined,
+            "payroll_report": self._fmt_payroll_report,
+            "all_employees": self._fmt_all_employees,
+            "error": self._fmt_error,
+        }
+        
+        # Shared compiled graph; nodes find this agent through the run config
+        self.graph = self._COMPILED_GRAPH
+        
+        # LRU cache of deterministic responses keyed by normalized query and user scope
+        self._response_cache = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+        
+        # LRU cache of (intent, permission_granted, denied_reason) keyed by lower-cased query and user
+        self._decision_cache = OrderedDict()
+        self._decision_cache_lock = threading.Lock()
+        
+        logger.info("✅ HR Agent fully initialized with LangGraph workflow")
+    
+    def warm(self):
+        """Load the search encoder ahead of the first ATS query"""
+        try:
+            self.ats_tools.warm()
+            logger.info("🔥 HR Agent warmed up")
+        except Exception as e:
+            logger.warning("⚠️ HR Agent warmup failed: %s", e)
+    
+    @property
+    def llm(self) -> "ChatGoogleGenerativeAI":
+        """Gemini chat client, created on first use since rule-based nodes answer most queries"""
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = _get_llm(self._google_api_key, 0.3)
+        return self._llm
+    
+    @staticmethod
+    def _agent_node(method_name: str):
+        """Wrap an HRAgent method as a node that runs on the agent passed in the run config"""
+        def run(state: AgentState, config: RunnableConfig) -> AgentState:
+            return getattr(config["configurable"]["agent"], method_name)(state)
+        return run
+    
+    @classmethod
+    def _classify_node(cls, state: AgentState, config: RunnableConfig) -> Command[Literal["handle_ats", "handle_payroll", "generate_response", "access_denied"]]:
+        """Classify and check permissions, writing the decision and the next node in one step"""
+        state = config["configurable"]["agent"]._classify_and_check(state)
+        return Command(update=state, goto=cls._ROUTES[cls._route_request(state)])
+    
+    @classmethod
+    def _build_graph(cls) -> CompiledStateGraph:
+        """Build the LangGraph workflow"""
+        workflow = StateGraph(AgentState)
+        
+        # Add nodes
+        workflow.add_node("classify_and_check", cls._classify_node)
+        workflow.add_node("handle_ats", cls._agent_node("_handle_ats"))
+        workflow.add_node("handle_payroll", cls._agent_node("_handle_payroll"))
+        workflow.add_node("generate_response", cls._agent_node("_generate_response"))
+        workflow.add_node("access_denied", cls._agent_node("_access_denied"))
+        
+        # Add edges
+        workflow.set_entry_point("classify_and_check")
+        workflow.add_edge("handle_ats", "generate_response")
+        workflow.add_edge("handle_payroll", "generate_response")
+        workflow.add_edge("generate_response", END)
+        workflow.add_edge("access_denied", END)
+        
+        return workflow.compile()
+    
+    def _extract_employee_id_or_name(self, query: str) -> str:
+        """Extract employee ID or name from query - ENHANCED VERSION"""
+        logger.debug("🔍 Extracting identifier from query: '%s'", query)
+        
+        # First, try to extract employee ID patterns like EMP001, EMP014, ADM001
+        emp_id_match = EMP_ID_RE.search(query)
+        if emp_id_match:
+            extracted_id = emp_id_match.group().upper()
+            logger.debug("✅ Extracted employee ID: %s", extracted_id)
+            return extracted_id
+        
+        # If no ID found, try to extract name with enhanced patterns
+        # Matches are scanned lazily so the first usable name stops the search
+        query_lower = query.lower()
+        for i, (required, pattern) in enumerate(NAME_PATTERNS):
+            if required and not any(literal in query_lower for literal in required):
+                continue
+            for match in pattern.finditer(query):
+                extracted_name = match.group(1).strip()
+                logger.debug("🔍 Pattern %s match: '%s'", i+1, extracted_name)
+                
+                # Clean the extracted name; an empty result fails the length check too
+                clean_name = ' '.join(
+                    word for word in extracted_name.lower().split()
+                    if len(word) > 1 and word not in NAME_EXCLUDED_WORDS
+                ).title()
+                if len(clean_name) > 2:  # At least 3 characters
+                    logger.debug("✅ Extracted employee name: '%s' (from pattern %s)", clean_name, i+1)
+                    return clean_name
+        
+        # If no good pattern match, look for any capitalized words that might be names
+        potential_names = []
+        
+        for word in query.split():
+            # Remove punctuation; plain alphanumeric words (most of them) skip the regex
+            cleaned_word = word if word.isalnum() else NON_WORD_RE.sub('', word)
+            if (len(cleaned_word) > 2 and 
+                cleaned_word[0].isupper() and 
+                cleaned_word.lower() not in NAME_EXCLUDED_WORDS):
+                potential_names.append(cleaned_word)
+                if len(potential_names) == 3:  # Max 3 words
+                    break
+        
+        if len(potential_names) >= 2:
+            combined_name = ' '.join(potential_names)
+            logger.debug("✅ Extracted potential name from words: '%s'", combined_name)
+            return combined_name
+        
+        logger.debug("❌ No employee ID or name extracted from: '%s'", query)
+        return None
+        
+    def _classify_and_check(self, state: AgentState) -> AgentState:
+        """Classify intent and check permissions in a single pass over the query"""
+        user_role = state.user_role
+        user_employee_id = state.user_employee_id
+        query = state.query_lower
+        
+        logger.debug("🧠 Classifying and checking permissions for %s (ID: %s): '%s'", user_role, user_employee_id, query)
+        
+        cache_key = (query, user_role, user_employee_id, state.user_name)
+        with self._decision_cache_lock:
+            decision = self._decision_cache.get(cache_key)
+            if decision is not None:
+                self._decision_cache.move_to_end(cache_key)
+        if decision is not None:
+            logger.debug("⚡ Reusing cached intent and permission decision")
+            state.intent, state.permission_granted, state.denied_reason = decision
+            return state
+        
+        # Collect every keyword group the query's tokens touch
+        keyword_groups = {
+            group for group, keywords in INTENT_KEYWORDS.items()
+            if not keywords.isdisjoint(state.query_tokens)
+        }
+        if "ats" in keyword_groups:
+            state.intent = "ats"
+        elif keyword_groups:
+            state.intent = "payroll"
+        else:
+            state.intent = "general"
+        logger.debug("🎯 Intent classified as: %s", state.intent)
+        
+        permission_rule = self._permission_rules.get((user_role, state.intent), self._check_admin_functions)
+        state.permission_granted, state.denied_reason = permission_rule(state, keyword_groups)
+        
+        with self._decision_cache_lock:
+            self._decision_cache[cache_key] = (state.intent, state.permission_granted, state.denied_reason)
+            if len(self._decision_cache) > DECISION_CACHE_SIZE:
+                self._decision_cache.popitem(last=False)
+        return state
+    
+    def _allow(self, state: AgentState, keyword_groups: set) -> tuple:
+        """Grant access unconditionally"""
+        logger.debug("✅ Permission granted")
+        return True, ""
+    
+    def _deny_ats(self, state: AgentState, keyword_groups: set) -> tuple:
+        """Regular users cannot use ATS functions"""
+        logger.info("❌ ATS access denied for regular user")
+        return False, "ATS access is restricted to HR Admin users only."
+    
+    def _check_admin_functions(self, state: AgentState, keyword_groups: set) -> tuple:
+        """Deny admin-only functions such as employee lists and payroll reports"""
+        if ADMIN_KEYWORDS_RE.search(state.query_lower):
+            logger.info("❌ Admin function access denied for regular user")
+            return False, "This function is available to HR Admin only."
+        return self._allow(state, keyword_groups)
+    
+    def _check_user_payroll_access(self, state: AgentState, keyword_groups: set) -> tuple:
+        """Regular users may only query their own payroll - FIXED LOGIC"""
+        if "payroll_access" not in keyword_groups:
+            return self._check_admin_functions(state, keyword_groups)
+        
+        user_employee_id = state.user_employee_id
+        
+        # Extract employee identifier from query
+        extracted_identifier = self._extract_employee_id_or_name(state.query_lower)
+        
+        logger.debug("🔍 Extracted identifier: '%s', User ID: '%s'", extracted_identifier, user_employee_id)
         
-        if result_type == "candidate_search":
-            results = tool_result.get("results", [])
-            if not results:
-                return "❌ No candidates found matching your search criteria."
+        # Allow access if:
+        # 1. No specific employee mentioned (general payroll query)
+        # 2. User's own employee ID is mentioned
+        # 3. User's own name is mentioned (partial match)
+        if extracted_identifier:
+            user_name = state.user_name
             
-            response = f"🎯 Found {len(results)} candidates:\n\n"
-            for i, candidate in enumerate(results, 1):
-                response += f"**{i}. {candidate['candidate_name']}** - {candidate['position']}\n"
-                response += f"   📧 Email: {candidate.get('contact_info', {}).get('email', 'N/A')}\n"
-                response += f"   💼 Experience: {candidate['experience_years']} years\n"
+            # Check if it matches user's employee ID or name
+            if self._identifier_matches_user(extracted_identifier, user_employee_id, user_name):
+                logger.debug("✅ User accessing own payroll")
+                return True, ""
+            
+            # If none match, deny access
+            logger.info("❌ Payroll access denied - '%s' doesn't match user '%s' or '%s'", extracted_identifier, user_employee_id, user_name)
+            return False, f"You can only access your own payroll information. Use your Employee ID '{user_employee_id}' or your name '{user_name}'."
+        else:
+            # No specific employee mentioned - allow general payroll queries
+            logger.debug("✅ General payroll query allowed")
+            return True, ""
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _identifier_matches_user(identifier: str, employee_id: str, name: str, match_name_parts: bool = False) -> bool:
+        """Whether an extracted ID or name refers to the user; match_name_parts also accepts any shared name part"""
+        if identifier.upper() == employee_id:
+            return True
+        if not name:
+            return False
+        
+        identifier_lower = identifier.lower()
+        name_lower = name.lower()
+        if identifier_lower in name_lower or name_lower in identifier_lower:
+            return True
+        return match_name_parts and (
+            any(part in identifier_lower for part in name_lower.split()) or
+            any(part in name_lower for part in identifier_lower.split())
+        )
+    
+    @staticmethod
+    def _route_request(state: AgentState) -> str:
+        """Route to the intent's handler, or to the denial node"""
+        return state.intent if state.permission_granted else "denied"
+    
+    def _access_denied(self, state: AgentState) -> AgentState:
+        """Handle access denied cases"""
+        state.final_response = ACCESS_DENIED_TEMPLATE.format_map({
+            "user_name": state.user_name or 'User',
+            "denied_reason": state.denied_reason,
+            "employee_id": state.user_employee_id
+        })
+        return state
+    
+    def _handle_ats(self, state: AgentState) -> AgentState:
+        """Handle ATS related tasks"""
+        try:
+            query = state.query_lower
+            logger.debug("📋 Handling ATS request: '%s'", query)
+            
+            if ATS_SEARCH_RE.search(query):
+                search_terms = self._extract_search_terms(query)
+                logger.debug("🔍 Searching for: '%s'", search_terms)
+                results = self.ats_tools.search_candidates(search_terms)
+                state.tool_result = {"type": "candidate_search", "results": results}
                 
-                if candidate.get('skills'):
-                    skills_display = ', '.join(candidate['skills'][:5])
-                    if len(candidate['skills']) > 5:
-                        skills_display += f" (+{len(candidate['skills'])-5} more)"
-                    response += f"   🛠️ Skills: {skills_display}\n"
+            elif ATS_LIST_RE.search(query):
+                logger.debug("📋 Getting all candidates")
+                results = self.ats_tools.get_all_candidates()
+                state.tool_result = {"type": "all_candidates", "results": results}
                 
-                if candidate.get('similarity_score'):
-                    response += f"   📊 Match Score: {1/candidate['similarity_score']:.2f}\n"
+            else:
+                state.tool_result = {
+                    "type": "ats_help",
+                    "message": "I can help you with: searching candidates, viewing all candidates, or managing CV applications."
+                }
+            
+        except Exception as e:
+            logger.error("❌ ATS error: %s", e)
+            state.tool_result = {"type": "error", "message": f"ATS error: {str(e)}"}
+        
+        return state
+    
+    def _handle_payroll(self, state: AgentState) -> AgentState:
+        """Handle payroll related tasks - ENHANCED WITH BETTER ERROR HANDLING"""
+        try:
+            query = state.query_lower
+            logger.debug("💰 Handling payroll request: '%s' for role: %s", query, state.user_role)
+            logger.debug("👤 User context: ID=%s, Name=%s", state.user_employee_id, state.user_name)
+            
+            # Admins may ask for the employee list and the payroll report together; both are independent reads
+            if state.user_role == 'admin' and PAYROLL_REPORT_RE.search(query) and PAYROLL_EMPLOYEES_RE.search(query):
+                state.tool_result = self._payroll_combined(state)
+                return state
+            
+            handler = next(
+                (handler for pattern, handler in self._payroll_handlers if pattern.search(query)),
+                self._payroll_help
+            )
+            state.tool_result = handler(state)
                 
-                response += f"   📝 Summary: {candidate.get('summary', 'No summary available')[:100]}...\n\n"
+        except Exception as e:
+            logger.exception("❌ Payroll handler error: %s", e)
+            state.tool_result = {"type": "error", "message": f"Payroll system error: {str(e)}"}
+        
+        return state
+    
+    def _payroll_combined(self, state: AgentState) -> Dict[str, Any]:
+        """Fetch the employee list and the payroll report concurrently"""
+        logger.debug("📊 Fetching employee list and payroll report concurrently")
+        employees = self._tool_executor.submit(self._fetch_all_employees)
+        report = self._tool_executor.submit(self._fetch_payroll_report, self._extract_department(state.query_lower))
+        return {"type": "combined", "results": [employees.result(), report.result()]}
+    
+    def _payroll_salary(self, state: AgentState) -> Dict[str, Any]:
+        """Calculate salaries, restricting regular users to their own"""
+        user_role = state.user_role
+        user_employee_id = state.user_employee_id
+        user_name = state.user_name
+        
+        # Admins may ask for several employees at once; each salary is an independent lookup
+        emp_ids = list(dict.fromkeys(emp_id.upper() for emp_id in EMP_ID_RE.findall(state.user_query)))
+        if user_role == 'admin' and len(emp_ids) > 1:
+            logger.debug("💰 Calculating %s salaries concurrently: %s", len(emp_ids), emp_ids)
+            # One query loads every employee, so each calculation below finds its record cached
+            self.payroll_tools.prefetch_employees_by_id(emp_ids)
+            results = list(self._tool_executor.map(self.payroll_tools.calculate_salary, emp_ids))
+            return {"type": "salary_calculations", "results": results}
+        
+        emp_identifier = self._extract_employee_id_or_name(state.user_query)
+        logger.debug("💰 Extracted employee identifier: '%s'", emp_identifier)
+        
+        # For non-admin users, enforce access control
+        if user_role != 'admin':
+            logger.debug("🔒 Non-admin user access control check")
             
-            return response
+            # If no identifier extracted, use user's own data
+            if not emp_identifier:
+                emp_identifier = user_employee_id
+                logger.debug("🔒 No identifier specified, using user's own ID: %s", emp_identifier)
+            else:
+                # Check if the identifier matches the user (ID, or name including partial name parts)
+                if not self._identifier_matches_user(emp_identifier, user_employee_id, user_name, match_name_parts=True):
+                    # Return access denied message instead of forcing
+                    return {
+                        "type": "error", 
+                        "message": f"Access denied. You can only access your own payroll information. Use '{user_employee_id}' or '{user_name}'"
+                    }
         
-        elif result_type == "all_candidates":
-            results = tool_result.get("results", [])
-            if not results:
-                return "❌ No candidates in the database."
+        # Proceed with salary calculation
+        if not emp_identifier:
+            return {
+                "type": "error", 
+                "message": f"Please specify your employee ID '{user_employee_id}' or use your name '{user_name}'"
+            }
+        
+        logger.debug("💰 Proceeding with salary calculation for: '%s'", emp_identifier)
+        
+        # Try the calculation
+        try:
+            result = self.payroll_tools.calculate_salary(emp_identifier)
+            
+            # Check if it's an access denied error for non-admin users
+            if "error" in result and user_role != 'admin':
+                # For regular users, if their identifier doesn't work, try their employee ID
+                if emp_identifier != user_employee_id:
+                    logger.debug("🔄 Retrying with user's employee ID: %s", user_employee_id)
+                    result = self.payroll_tools.calculate_salary(user_employee_id)
             
-            response = f"📋 **All Candidates ({len(results)} total):**\n\n"
-            for i, candidate in enumerate(results, 1):
-                response += f"{i}. **{candidate['candidate_name']}** - {candidate['position']}\n"
-                response += f"   💼 Experience: {candidate['experience_years']} years\n"
-                if candidate.get('skills'):
-                    response += f"   🛠️ Skills: {', '.join(candidate['skills'][:3])}\n"
-                response += "\n"
+            return {"type": "salary_calculation", "result": result}
             
-            return response
+        except Exception as e:
+            logger.error("❌ Salary calculation failed: %s", e)
+            return {
+                "type": "error", 
+                "message": f"Error calculating salary: {str(e)}"
+            }
+    
+    def _payroll_report(self, state: AgentState) -> Dict[str, Any]:
+        """Generate a payroll report for admins"""
+        if state.user_role != 'admin':
+            return {"type": "error", "message": "Payroll reports are available to HR Admin only"}
+        return self._fetch_payroll_report(self._extract_department(state.query_lower))
+    
+    def _payroll_employees(self, state: AgentState) -> Dict[str, Any]:
+        """List all employees for admins"""
+        if state.user_role != 'admin':
+            return {"type": "error", "message": "Employee list is available to HR Admin only"}
+        return self._fetch_all_employees()
+    
+    def _payroll_debug(self, state: AgentState) -> Dict[str, Any]:
+        """Debug functionality for admin users; everyone else gets payroll help"""
+        if state.user_role != 'admin':
+            return self._payroll_help(state)
+        
+        logger.debug("🔧 Running debug for admin user")
+        try:
+            debug_info = self.payroll_tools.debug_employee_data()
+            return {"type": "debug_info", "result": debug_info}
+        except Exception as e:
+            return {"type": "error", "message": f"Debug failed: {str(e)}"}
+    
+    def _payroll_help(self, state: AgentState) -> Dict[str, Any]:
+        """General payroll help"""
+        if state.user_role == 'admin':
+            help_message = PAYROLL_HELP_ADMIN
+        else:
+            help_message = PAYROLL_HELP_USER_TEMPLATE.format(employee_id=state.user_employee_id, user_name=state.user_name)
+        
+        return {
+            "type": "payroll_help",
+            "message": help_message
+        }
+    
+    def _fetch_payroll_report(self, department: str) -> Dict[str, Any]:
+        """Run the payroll report tool, returning its tool result or an error result"""
+        logger.debug("📊 Generating payroll report for: %s", department or 'all departments')
+        try:
+            result = self.payroll_tools.generate_payroll_report(department)
+            return {"type": "payroll_report", "result": result}
+        except Exception as e:
+            logger.error("❌ Payroll report failed: %s", e)
+            return {"type": "error", "message": f"Error generating report: {str(e)}"}
+    
+    def _fetch_all_employees(self) -> Dict[str, Any]:
+        """Run the employee list tool, returning its tool result or an error result"""
+        logger.debug("👥 Getting all employees")
+        try:
+            results = self.payroll_tools.get_all_employees()
+            if results and len(results) > 0 and "error" not in results[0]:
+                return {"type": "all_employees", "results": results}
+            error_msg = results[0].get("error", "No employees found") if results else "No employees found"
+            return {"type": "error", "message": error_msg}
+        except Exception as e:
+            logger.error("❌ Get all employees failed: %s", e)
+            return {"type": "error", "message": f"Error getting employees: {str(e)}"}
+    
+    def _generate_response(self, state: AgentState) -> AgentState:
+        """Generate final response"""
+        try:
+            user_name = state.user_name or 'User'
+            user_role = state.user_role
+            
+            if state.intent == "general":
+                state.final_response = self._generate_general_response(state.query_lower, user_name, user_role)
+            else:
+                state.final_response = self._format_tool_result(state.tool_result, user_role)
+        except Exception as e:
+            logger.error("❌ Error generating response: %s", e)
+            state.final_response = f"Error generating response: {str(e)}"
         
-        elif result_type == "salary_calculation":
-            result = tool_result.get("result", {})
-            if "error" in result:
-                return f"❌ Error: {result['error']}"
+        return state
+    
+    def _generate_general_response(self, query_lower: str, user_name: str, user_role: str) -> str:
+        """Generate context-aware general responses based on user role and the lower-cased query"""
+        return self._render_general_response(user_role, self._general_topic(query_lower, user_role), user_name)
+    
+    def _general_topic(self, query_lower: str, user_role: str) -> str:
+        """Pick which general response a lower-cased query asks for"""
+        if user_role == 'admin':
+            return "capabilities"
+        
+        for topic, pattern in GENERAL_TOPIC_PATTERNS:
+            if pattern.search(query_lower):
+                return topic
+        return "default"
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _render_general_response(user_role: str, topic: str, user_name: str) -> str:
+        """Render a general response; the text depends only on role, topic and name, so it is cached"""
+        if user_role == 'admin':
+            return f"👋 Hello {user_name}!\n\n{ADMIN_CAPABILITIES}\n\nHow can I help you today?"
+        return USER_GENERAL_RESPONSES[topic].format(user_name=user_name)
+    
+    def _format_tool_result(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format tool results for display"""
+        result_type = tool_result.get("type", "unknown")
+        return self._formatters.get(result_type, self._fmt_default)(tool_result, user_role)
+    
+    def _fmt_candidate_search(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format candidate search results"""
+        results = tool_result.get("results", [])
+        if not results:
+            return "❌ No candidates found matching your search criteria."
+        
+        parts = [f"🎯 Found {len(results)} candidates:\n\n"]
+        for i, candidate in enumerate(results, 1):
+            parts.append(f"**{i}. {candidate['candidate_name']}** - {candidate['position']}\n")
+            parts.append(f"   📧 Email: {candidate.get('contact_info', {}).get('email', 'N/A')}\n")
+            parts.append(f"   💼 Experience: {candidate['experience_years']} years\n")
             
-            return f"""
+            if candidate.get('skills'):
+                skills_display = ', '.join(candidate['skills'][:5])
+                if len(candidate['skills']) > 5:
+                    skills_display += f" (+{len(candidate['skills'])-5} more)"
+                parts.append(f"   🛠️ Skills: {skills_display}\n")
+            
+            if candidate.get('match_score') is not None:
+                parts.append(f"   📊 Match Score: {candidate['match_score']:.2f}\n")
+            
+            parts.append(f"   📝 Summary: {candidate.get('summary', 'No summary available')[:100]}...\n\n")
+        
+        return "".join(parts)
+    
+    def _fmt_all_candidates(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format the full candidate list"""
+        results = tool_result.get("results", [])
+        if not results:
+            return "❌ No candidates in the database."
+        
+        parts = [f"📋 **All Candidates ({len(results)} total):**\n\n"]
+        for i, candidate in enumerate(results, 1):
+            parts.append(f"{i}. **{candidate['candidate_name']}** - {candidate['position']}\n")
+            parts.append(f"   💼 Experience: {candidate['experience_years']} years\n")
+            if candidate.get('skills'):
+                parts.append(f"   🛠️ Skills: {', '.join(candidate['skills'][:3])}\n")
+            parts.append("\n")
+        
+        return "".join(parts)
+    
+    def _fmt_salary_calculation(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format a single salary calculation"""
+        result = tool_result.get("result", {})
+        if "error" in result:
+            return f"❌ Error: {result['error']}"
+        
+        return f"""
 💰 **Salary Calculation for {result['name']}**
 
 👤 **Employee Details:**
@@ -699,13 +881,27 @@ For candidate management and ATS functions, please contact your HR Admin.
 
 📅 Calculated on: {result.get('calculation_date', 'Unknown')}
 """
+    
+    def _fmt_salary_calculations(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format several salary calculations"""
+        return "\n".join(
+            self._fmt_salary_calculation({"type": "salary_calculation", "result": result}, user_role)
+            for result in tool_result.get("results", [])
+        )
+    
+    def _fmt_combined(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format several independent tool results, one after another"""
+        return "\n".join(
+            self._format_tool_result(result, user_role) for result in tool_result.get("results", [])
+        )
+    
+    def _fmt_payroll_report(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format a payroll report"""
+        result = tool_result.get("result", {})
+        if "error" in result:
+            return f"❌ Error: {result['error']}"
         
-        elif result_type == "payroll_report":
-            result = tool_result.get("result", {})
-            if "error" in result:
-                return f"❌ Error: {result['error']}"
-            
-            response = f"""
+        parts = [f"""
 📊 **Payroll Report - {result['department']}**
 
 📈 **Summary Statistics:**
@@ -718,82 +914,124 @@ For candidate management and ATS functions, please contact your HR Admin.
 • **Total Net Salary: Rs. {result['total_net_salary']:,.2f}**
 
 👥 **Employee Details:**
-"""
-            for emp in result['employees']:
-                response += f"• {emp['name']} ({emp['employee_id']}): Rs. {emp['net_salary']:,.2f}\n"
-            
-            response += f"\n📅 Generated on: {result.get('generated_at', 'Unknown')}"
-            return response
+"""]
+        parts.extend(
+            f"• {emp['name']} ({emp['employee_id']}): Rs. {emp['net_salary']:,.2f}\n"
+            for emp in result['employees']
+        )
         
-        elif result_type == "all_employees":
-            results = tool_result.get("results", [])
-            if not results:
-                return "❌ No employees found."
-            
-            response = f"👥 **All Employees ({len(results)} total):**\n\n"
-            for emp in results:
-                response += f"• **{emp['name']}** ({emp['employee_id']}) - {emp['department']}\n"
-                response += f"  📍 Position: {emp['position']}\n"
-                response += f"  💰 Salary: Rs. {emp['salary']:,}\n\n"
-            
-            return response
+        parts.append(f"\n📅 Generated on: {result.get('generated_at', 'Unknown')}")
+        return "".join(parts)
+    
+    def _fmt_all_employees(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format the employee list"""
+        results = tool_result.get("results", [])
+        if not results:
+            return "❌ No employees found."
         
-        elif result_type == "error":
-            return f"❌ **Error:** {tool_result.get('message', 'Unknown error occurred')}"
+        parts = [f"👥 **All Employees ({len(results)} total):**\n\n"]
+        parts.extend(
+            f"• **{emp['name']}** ({emp['employee_id']}) - {emp['department']}\n"
+            f"  📍 Position: {emp['position']}\n"
+            f"  💰 Salary: Rs. {emp['salary']:,}\n\n"
+            for emp in results
+        )
         
-        else:
-            return tool_result.get("message", "✅ Task completed successfully.")
+        return "".join(parts)
+    
+    def _fmt_error(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format a tool error"""
+        return f"❌ **Error:** {tool_result.get('message', 'Unknown error occurred')}"
+    
+    def _fmt_default(self, tool_result: Dict[str, Any], user_role: str) -> str:
+        """Format help messages and other results"""
+        return tool_result.get("message", "✅ Task completed successfully.")
     
-    def _extract_search_terms(self, query: str) -> str:
-        """Extract search terms from query"""
-        stop_words = {"search", "for", "find", "candidates", "candidate", "who", "with", "have", "are"}
-        words = query.lower().split()
-        search_terms = [word for word in words if word not in stop_words]
-        return " ".join(search_terms)
+    def _extract_search_terms(self, query_lower: str) -> str:
+        """Extract search terms from the lower-cased query"""
+        return " ".join([word for word in query_lower.split() if word not in SEARCH_STOP_WORDS])
     
     def _extract_employee_id(self, query: str) -> str:
         """Extract employee ID from query"""
-        import re
         # Look for patterns like EMP001, EMP014, ADM001
-        match = re.search(r'(EMP\d{3}|ADM\d{3})', query.upper())
-        extracted_id = match.group() if match else None
-        print(f"🔍 Extracted employee ID from '{query}': {extracted_id}")
+        match = EMP_ID_RE.search(query)
+        extracted_id = match.group().upper() if match else None
+        logger.debug("🔍 Extracted employee ID from '%s': %s", query, extracted_id)
         return extracted_id
     
-    def _extract_department(self, query: str) -> str:
-        """Extract department name from query"""
-        departments = ["IT", "HR", "Finance", "Marketing"]
-        query_lower = query.lower()
-        for dept in departments:
-            if dept.lower() in query_lower:
-                return dept
-        return None
+    def _extract_department(self, query_lower: str) -> str:
+        """Extract department name from the lower-cased query"""
+        match = DEPARTMENT_RE.search(query_lower)
+        return DEPARTMENTS[match.group(1)] if match else None
+    
+    def _response_cache_key(self, query_lower: str, user_context: Dict[str, Any]) -> tuple:
+        """Build a response cache key from the normalized query and everything responses are personalized with"""
+        return (
+            " ".join(query_lower.split()),
+            user_context.get('role', 'user'),
+            user_context.get('employee_id'),
+            user_context.get('name')
+        )
+    
+    def _is_cacheable(self, final_state: Dict[str, Any]) -> bool:
+        """Only general and help responses are fixed for a given query and user"""
+        if not final_state.get("permission_granted"):
+            return False
+        return (final_state.get("intent") == "general" or
+                final_state.get("tool_result", {}).get("type") in CACHEABLE_RESULT_TYPES)
     
     def process_query(self, user_query: str, user_context: Dict[str, Any]) -> str:
         """Main method to process user queries with role-based access"""
         try:
-            print(f"\n🚀 Processing query: '{user_query}' for user: {user_context.get('name')}")
+            logger.debug("🚀 Processing query: '%s' for user: %s", user_query, user_context.get('name'))
             
-            # Create initial state as a dictionary
-            initial_state: AgentState = {
-                "messages": [],
-                "user_query": user_query,
-                "user_context": user_context,
-                "intent": "",
-                "tool_result": {},
-                "final_response": "",
-                "permission_granted": False,
-                "denied_reason": ""
-            }
+            query_lower = user_query.strip().lower()
+            query_tokens = frozenset(QUERY_TOKEN_RE.findall(query_lower))
+            
+            # Queries that touch no ATS or payroll keyword always get the general response for any role
+            if ALL_INTENT_KEYWORDS.isdisjoint(query_tokens):
+                logger.debug("⚡ No tool keywords - answering without the graph")
+                return self._generate_general_response(
+                    query_lower,
+                    user_context.get('name', 'User'),
+                    user_context.get('role', 'user')
+                )
+            
+            cache_key = self._response_cache_key(query_lower, user_context)
+            with self._response_cache_lock:
+                cached_response = self._response_cache.get(cache_key)
+                if cached_response is not None:
+                    self._response_cache.move_to_end(cache_key)
+            if cached_response is not None:
+                logger.debug("⚡ Returning cached response")
+                return cached_response
+            
+            # Create initial state
+            initial_state = AgentState(
+                user_query=user_query,
+                query_lower=query_lower,
+                query_tokens=query_tokens,
+                user_context=user_context,
+                user_role=user_context.get('role', 'user'),
+                user_employee_id=user_context.get('employee_id'),
+                user_name=user_context.get('name', '')
+            )
             
             # Run the graph
-            final_state = self.graph.invoke(initial_state)
+            final_state = self.graph.invoke(initial_state, config={"configurable": {"agent": self}})
             
-            print(f"✅ Query processed successfully")
+            if self._is_cacheable(final_state):
+                with self._response_cache_lock:
+                    self._response_cache[cache_key] = final_state["final_response"]
+                    if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                        self._response_cache.popitem(last=False)
+            
+            logger.debug("✅ Query processed successfully")
             return final_state["final_response"]
             
         except Exception as e:
-            print(f"❌ Error processing query: {e}")
-            import traceback
-            traceback.print_exc()
-            return f"❌ Error processing query: {str(e)}"
\ No newline at end of file
+            logger.exception("❌ Error processing query: %s", e)
+            return f"❌ Error processing query: {str(e)}"
+
+
+HRAgent._COMPILED_GRAPH = HRAgent._build_graph()
@@ -1,20 +1,98 @@
-from typing import Dict, Any, List
-import os
-import sys
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+import logging
 import re
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import threading
+import time
 
-from services.employee_service import EmployeeService
+from services.employee_service import get_employee_service
+
+logger = logging.getLogger(__name__)
+
+# Employee IDs look like EMP001 or ADM001; compiled once for every lookup. Matching ignores case,
+# so only identifiers that really are IDs get upper-cased for the lookup
+EMPLOYEE_ID_RE = re.compile(r'^(?:EMP|ADM)\d{3}$', re.IGNORECASE)
+
+# Names already resolved map to their employee ID for a short while, so one conversation asking
+# about the same person skips the name search; the record itself always comes from the
+# EmployeeService ID cache, which is invalidated when an employee changes
+NAME_CACHE_SIZE = 256
+NAME_CACHE_TTL = 60.0
+# Full employee scans used by helper paths (department list, debug, not-found hints) are shared briefly
+ALL_EMPLOYEES_TTL = 30.0
 
 class PayrollTools:
+    # Fixed attribute set, so instances need no per-instance __dict__
+    __slots__ = (
+        'data_dir', 'employee_service',
+        '_name_cache', '_cache_lock',
+        '_all_employees', '_all_employees_at', '_employee_sample'
+    )
+    
     def __init__(self, data_dir: str):
         self.data_dir = data_dir
         try:
-            self.employee_service = EmployeeService()
-            print("✅ PayrollTools initialized with EmployeeService")
+            self.employee_service = get_employee_service()
+            logger.info("✅ PayrollTools initialized with EmployeeService")
         except Exception as e:
-            print(f"❌ Error initializing PayrollTools: {e}")
+            logger.error("❌ Error initializing PayrollTools: %s", e)
             self.employee_service = None
+        
+        self._name_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._all_employees = None
+        self._all_employees_at = 0.0
+        self._employee_sample = None
+    
+    def _get_all_employees_cached(self) -> List[Dict[str, Any]]:
+        """All employees, refetched only when the last scan is older than ALL_EMPLOYEES_TTL"""
+        now = time.monotonic()
+        with self._cache_lock:
+            if self._all_employees is not None and now - self._all_employees_at < ALL_EMPLOYEES_TTL:
+                return list(self._all_employees)
+        
+        employees = self.employee_service.get_all_employees()
+        with self._cache_lock:
+            self._all_employees = list(employees)
+            self._all_employees_at = now
+        return employees
+    
+    def _lookup_by_id(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Employee by exact ID, served from the EmployeeService cache"""
+        return self.employee_service.get_employee_by_id(employee_id)
+    
+    def prefetch_employees_by_id(self, employee_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Employees by exact ID; warms the EmployeeService cache so later ID lookups skip the database"""
+        if not self.employee_service:
+            return {}
+        return self.employee_service.get_employees_by_ids(employee_ids)
+    
+    def _lookup_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Employee by name; a recently resolved name goes straight to the ID lookup"""
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._name_cache.get(name)
+            if cached is not None and now - cached[0] < NAME_CACHE_TTL:
+                self._name_cache.move_to_end(name)
+                employee_id = cached[1]
+            else:
+                employee_id = None
+        
+        if employee_id:
+            employee = self.employee_service.get_employee_by_id(employee_id)
+            if employee:
+                return employee
+        
+        employee = self.employee_service.get_employee_by_name(name)
+        with self._cache_lock:
+            if employee:
+                self._name_cache[name] = (now, employee['employee_id'])
+                self._name_cache.move_to_end(name)
+                if len(self._name_cache) > NAME_CACHE_SIZE:
+                    self._name_cache.popitem(last=False)
+            else:
+                self._name_cache.pop(name, None)
+        return employee
     
     def calculate_salary(self, employee_identifier: str) -> Dict[str, Any]:
         """Calculate employee salary using employee ID or name"""
@@ -22,7 +100,7 @@ class PayrollTools:
             if not self.employee_service:
                 return {"error": "Employee service not available"}
             
-            print(f"💰 PayrollTools: Calculating salary for '{employee_identifier}'")
+            logger.debug("💰 PayrollTools: Calculating salary for '%s'", employee_identifier)
             
             # Clean the identifier
             clean_identifier = employee_identifier.strip() if employee_identifier else ""
@@ -34,28 +112,26 @@ class PayrollTools:
             employee = None
             
             # Check if it's an employee ID (EMP### or ADM###)
-            if re.match(r'^(EMP|ADM)\d{3}$', clean_identifier.upper()):
+            if EMPLOYEE_ID_RE.match(clean_identifier):
                 employee_id = clean_identifier.upper()
-                employee = self.employee_service.get_employee_by_id(employee_id)
-                print(f"🔍 Searched by Employee ID: {employee_id}")
+                employee = self._lookup_by_id(employee_id)
+                logger.debug("🔍 Searched by Employee ID: %s", employee_id)
             
             # If not found by ID, try to find by name
             if not employee:
-                print(f"🔍 Searching by name: {clean_identifier}")
-                employee = self.employee_service.get_employee_by_name(clean_identifier)
-            
-            # If still not found, try using the general identifier method
-            if not employee:
-                print(f"🔍 Searching by general identifier: {clean_identifier}")
-                employee = self.employee_service.get_employee_by_identifier(clean_identifier)
+                logger.debug("🔍 Searching by name: %s", clean_identifier)
+                employee = self._lookup_by_name(clean_identifier)
             
             # If still not found, provide helpful error message
             if not employee:
-                available_employees = self.employee_service.get_all_employees()
+                # Only a hint, so a few employees fetched once are enough
+                if not self._employee_sample:
+                    self._employee_sample = self.employee_service.get_employee_sample(5)
+                available_employees = self._employee_sample
                 if available_employees:
                     # Show first 5 employees as examples
                     examples = []
-                    for emp in available_employees[:5]:
+                    for emp in available_employees:
                         examples.append(f"{emp['employee_id']}: {emp['name']}")
                     
                     return {
@@ -68,16 +144,14 @@ class PayrollTools:
             result = self.employee_service.calculate_salary(employee['employee_id'])
             
             if "error" in result:
-                print(f"❌ PayrollTools calculation error: {result['error']}")
+                logger.warning("❌ PayrollTools calculation error: %s", result['error'])
             else:
-                print(f"✅ PayrollTools: Salary calculated successfully for {employee['name']}")
+                logger.debug("✅ PayrollTools: Salary calculated successfully for %s", employee['name'])
             
             return result
             
         except Exception as e:
-            print(f"❌ PayrollTools error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ PayrollTools error: %s", e)
             return {"error": f"Error calculating salary: {str(e)}"}
     
     def generate_payroll_report(self, department: str = None) -> Dict[str, Any]:
@@ -86,22 +160,20 @@ class PayrollTools:
             if not self.employee_service:
                 return {"error": "Employee service not available"}
             
-            print(f"📊 PayrollTools: Generating payroll report for {department or 'all departments'}")
+            logger.debug("📊 PayrollTools: Generating payroll report for %s", department or 'all departments')
             result = self.employee_service.generate_payroll_report(department)
             
             if "error" in result:
-                print(f"❌ PayrollTools report error: {result['error']}")
+                logger.warning("❌ PayrollTools report error: %s", result['error'])
             else:
                 total_employees = result.get('total_employees', 0)
                 total_net = result.get('total_net_salary', 0)
-                print(f"✅ PayrollTools: Report generated successfully - {total_employees} employees, Total: Rs. {total_net:,.2f}")
+                logger.debug("✅ PayrollTools: Report generated successfully - %s employees, Total: Rs. %.2f", total_employees, total_net)
             
             return result
             
         except Exception as e:
-            print(f"❌ PayrollTools error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ PayrollTools error: %s", e)
             return {"error": f"Error generating payroll report: {str(e)}"}
     
     def get_all_employees(self) -> List[Dict[str, Any]]:
@@ -110,21 +182,19 @@ class PayrollTools:
             if not self.employee_service:
                 return [{"error": "Employee service not available"}]
             
-            print("👥 PayrollTools: Getting all employees")
+            logger.debug("👥 PayrollTools: Getting all employees")
             result = self.employee_service.get_all_employees()
             
             if result:
-                print(f"✅ PayrollTools: Retrieved {len(result)} employees")
+                logger.debug("✅ PayrollTools: Retrieved %s employees", len(result))
             else:
-                print("⚠️ PayrollTools: No employees found")
+                logger.warning("⚠️ PayrollTools: No employees found")
                 return [{"error": "No employees found in database"}]
             
             return result
             
         except Exception as e:
-            print(f"❌ PayrollTools error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ PayrollTools error: %s", e)
             return [{"error": f"Error getting employees: {str(e)}"}]
     
     def get_employee_by_identifier(self, identifier: str) -> Dict[str, Any]:
@@ -133,37 +203,30 @@ class PayrollTools:
             if not self.employee_service:
                 return {"error": "Employee service not available"}
             
-            print(f"🔍 PayrollTools: Getting employee by identifier: {identifier}")
+            logger.debug("🔍 PayrollTools: Getting employee by identifier: %s", identifier)
             
             clean_identifier = identifier.strip() if identifier else ""
             if not clean_identifier:
                 return {"error": "Please provide employee ID or name"}
             
             # Try by ID first
-            if re.match(r'^(EMP|ADM)\d{3}$', clean_identifier.upper()):
-                employee = self.employee_service.get_employee_by_id(clean_identifier.upper())
+            if EMPLOYEE_ID_RE.match(clean_identifier):
+                employee_id = clean_identifier.upper()
+                employee = self._lookup_by_id(employee_id)
                 if employee:
-                    print(f"✅ Found employee by ID: {employee['name']}")
+                    logger.debug("✅ Found employee by ID: %s", employee['name'])
                     return employee
             
             # Try by name
-            employee = self.employee_service.get_employee_by_name(clean_identifier)
-            if employee:
-                print(f"✅ Found employee by name: {employee['name']}")
-                return employee
-            
-            # Try general identifier search
-            employee = self.employee_service.get_employee_by_identifier(clean_identifier)
+            employee = self._lookup_by_name(clean_identifier)
             if employee:
-                print(f"✅ Found employee by identifier: {employee['name']}")
+                logger.debug("✅ Found employee by name: %s", employee['name'])
                 return employee
             
             return {"error": f"Employee '{identifier}' not found"}
             
         except Exception as e:
-            print(f"❌ PayrollTools error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ PayrollTools error: %s", e)
             return {"error": f"Error getting employee: {str(e)}"}
     
     def search_employees(self, search_term: str) -> List[Dict[str, Any]]:
@@ -172,22 +235,23 @@ class PayrollTools:
             if not self.employee_service:
                 return [{"error": "Employee service not available"}]
             
-            print(f"🔍 PayrollTools: Searching employees with term: {search_term}")
+            logger.debug("🔍 PayrollTools: Searching employees with term: %s", search_term)
             
-            if not search_term or not search_term.strip():
+            clean_term = search_term.strip() if search_term else ""
+            if not clean_term:
                 return [{"error": "Please provide search term"}]
             
-            result = self.employee_service.search_employees(search_term.strip())
+            result = self.employee_service.search_employees(clean_term)
             
             if result:
-                print(f"✅ PayrollTools: Found {len(result)} employees matching '{search_term}'")
+                logger.debug("✅ PayrollTools: Found %s employees matching '%s'", len(result), search_term)
             else:
-                print(f"⚠️ PayrollTools: No employees found matching '{search_term}'")
+                logger.warning("⚠️ PayrollTools: No employees found matching '%s'", search_term)
             
             return result
             
         except Exception as e:
-            print(f"❌ PayrollTools error: {e}")
+            logger.error("❌ PayrollTools error: %s", e)
             return [{"error": f"Error searching employees: {str(e)}"}]
     
     def get_employee_analytics(self) -> Dict[str, Any]:
@@ -196,17 +260,17 @@ class PayrollTools:
             if not self.employee_service:
                 return {"error": "Employee service not available"}
             
-            print("📊 PayrollTools: Getting employee analytics")
+            logger.debug("📊 PayrollTools: Getting employee analytics")
             result = self.employee_service.get_employee_analytics()
             
             if "error" not in result:
                 total = result.get('total_employees', 0)
-                print(f"✅ PayrollTools: Analytics generated for {total} employees")
+                logger.debug("✅ PayrollTools: Analytics generated for %s employees", total)
             
             return result
             
         except Exception as e:
-            print(f"❌ PayrollTools error: {e}")
+            logger.error("❌ PayrollTools error: %s", e)
             return {"error": f"Error getting analytics: {str(e)}"}
     
     def validate_employee_identifier(self, identifier: str) -> Dict[str, Any]:
@@ -215,14 +279,14 @@ class PayrollTools:
             if not self.employee_service:
                 return {"valid": False, "error": "Employee service not available"}
             
-            if not identifier or not identifier.strip():
+            clean_identifier = identifier.strip() if identifier else ""
+            if not clean_identifier:
                 return {"valid": False, "error": "Empty identifier provided"}
             
-            clean_identifier = identifier.strip()
-            
             # Check by ID
-            if re.match(r'^(EMP|ADM)\d{3}$', clean_identifier.upper()):
-                employee = self.employee_service.get_employee_by_id(clean_identifier.upper())
+            if EMPLOYEE_ID_RE.match(clean_identifier):
+                employee_id = clean_identifier.upper()
+                employee = self._lookup_by_id(employee_id)
                 if employee:
                     return {
                         "valid": True, 
@@ -231,7 +295,7 @@ class PayrollTools:
                     }
             
             # Check by name
-            employee = self.employee_service.get_employee_by_name(clean_identifier)
+            employee = self._lookup_by_name(clean_identifier)
             if employee:
                 return {
                     "valid": True, 
@@ -245,7 +309,7 @@ class PayrollTools:
             }
             
         except Exception as e:
-            print(f"❌ PayrollTools validation error: {e}")
+            logger.error("❌ PayrollTools validation error: %s", e)
             return {"valid": False, "error": f"Validation error: {str(e)}"}
     
     def get_salary_summary(self, employee_identifier: str) -> Dict[str, Any]:
@@ -256,8 +320,9 @@ class PayrollTools:
             if not validation["valid"]:
                 return {"error": validation["error"]}
             
+            # Validation already resolved the employee, so calculate straight from its ID
             employee = validation["employee"]
-            salary_calc = self.calculate_salary(employee_identifier)
+            salary_calc = self.employee_service.calculate_salary(employee["employee_id"])
             
             if "error" in salary_calc:
                 return salary_calc
@@ -277,7 +342,7 @@ class PayrollTools:
             return summary
             
         except Exception as e:
-            print(f"❌ PayrollTools summary error: {e}")
+            logger.error("❌ PayrollTools summary error: %s", e)
             return {"error": f"Error generating salary summary: {str(e)}"}
     
     def get_department_list(self) -> List[str]:
@@ -286,15 +351,14 @@ class PayrollTools:
             if not self.employee_service:
                 return []
             
-            employees = self.employee_service.get_all_employees()
-            departments = list(set(emp.get('department', 'Unknown') for emp in employees))
-            departments.sort()
+            employees = self._get_all_employees_cached()
+            departments = sorted({emp.get('department') or 'Unknown' for emp in employees})
             
-            print(f"✅ PayrollTools: Found {len(departments)} departments")
+            logger.debug("✅ PayrollTools: Found %s departments", len(departments))
             return departments
             
         except Exception as e:
-            print(f"❌ PayrollTools error getting departments: {e}")
+            logger.error("❌ PayrollTools error getting departments: %s", e)
             return []
     
     def debug_employee_data(self) -> Dict[str, Any]:
@@ -303,36 +367,30 @@ class PayrollTools:
             if not self.employee_service:
                 return {"error": "Employee service not available"}
             
-            print("🔧 PayrollTools: Running employee data debug...")
+            logger.debug("🔧 PayrollTools: Running employee data debug...")
             
             # Get all employees
-            all_employees = self.employee_service.get_all_employees()
+            all_employees = self._get_all_employees_cached()
+            
+            employees = [{
+                "employee_id": emp.get("employee_id"),
+                "name": emp.get("name"),
+                "department": emp.get("department"),
+                "position": emp.get("position"),
+                "salary": emp.get("salary", 0)
+            } for emp in all_employees]
             
             debug_info = {
                 "total_employees": len(all_employees),
-                "employees": [],
-                "departments": set(),
-                "employee_ids": [],
-                "names": []
+                "employees": employees,
+                "departments": list({emp.get("department", "Unknown") for emp in all_employees}),
+                "employee_ids": [emp["employee_id"] for emp in employees],
+                "names": [emp["name"] for emp in employees]
             }
             
-            for emp in all_employees:
-                debug_info["employees"].append({
-                    "employee_id": emp.get("employee_id"),
-                    "name": emp.get("name"),
-                    "department": emp.get("department"),
-                    "position": emp.get("position"),
-                    "salary": emp.get("salary", 0)
-                })
-                debug_info["departments"].add(emp.get("department", "Unknown"))
-                debug_info["employee_ids"].append(emp.get("employee_id"))
-                debug_info["names"].append(emp.get("name"))
-            
-            debug_info["departments"] = list(debug_info["departments"])
-            
-            print(f"✅ Debug complete: {len(all_employees)} employees found")
+            logger.debug("✅ Debug complete: %s employees found", len(all_employees))
             return debug_info
             
         except Exception as e:
-            print(f"❌ PayrollTools debug error: {e}")
+            logger.error("❌ PayrollTools debug error: %s", e)
             return {"error": f"Debug failed: {str(e)}"}
\ No newline at end of file
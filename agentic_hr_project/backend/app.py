@@ -7,16 +7,62 @@ import sys
 # Add current directory to Python path
 sys.path.append(os.path.dirname(__file__))
 
-from agents.graph import HRAgent
-from services.user_service import UserService
-import traceback
-from datetime import datetime
+from config.logging_config import setup_logging
+from config.threading_config import setup_thread_env
+
+# Native thread pools read OMP_NUM_THREADS when faiss/torch load, so size them before the agents import
+setup_thread_env()
 
 # Load environment variables
 load_dotenv()
 
+# Console logging runs on a background thread; set LOG_LEVEL=DEBUG for per-request traces.
+# Set up before importing the agents so no startup messages are lost
+setup_logging()
+
+from agents.graph import HRAgent
+from services.user_service import get_user_service
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
+# orjson serialises responses much faster than the stdlib encoder; jsonify picks it up through app.json
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+    
+    class OrjsonProvider(DefaultJSONProvider):
+        """JSON provider backed by orjson, keeping Flask's key sorting and date handling"""
+        
+        def _options(self, pretty: bool = False) -> int:
+            options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                options |= orjson.OPT_SORT_KEYS
+            if pretty:
+                options |= orjson.OPT_INDENT_2
+            return options
+        
+        def dumps(self, obj, **kwargs) -> str:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+        
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            pretty = self.compact is False or (self.compact is None and self._app.debug)
+            body = orjson.dumps(obj, default=self.default, option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE)
+            return self._app.response_class(body, mimetype=self.mimetype)
+    
+    app.json = OrjsonProvider(app)
+    logger.info("✅ Using orjson for JSON responses")
+except ImportError:
+    logger.warning("⚠️ orjson not installed - using the standard JSON provider")
+
 # CORS configuration
 CORS(app, 
      supports_credentials=True,
@@ -26,31 +72,57 @@ CORS(app,
 
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
-print("🚀 Starting HR System Backend...")
+# With REDIS_URL set, sessions live in Redis and the cookie only carries the session ID
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    try:
+        import redis
+        from flask_session import Session
+        
+        app.config.update(
+            SESSION_TYPE='redis',
+            SESSION_REDIS=redis.Redis.from_url(REDIS_URL),
+            SESSION_PERMANENT=True
+        )
+        Session(app)
+        logger.info("✅ Server-side sessions stored in Redis")
+    except ImportError as e:
+        logger.warning("⚠️ Flask-Session or redis not installed - using cookie sessions: %s", e)
+
+UPLOAD_COPY_BUFFER = 1 << 20
+
+# Supported CV file formats
+ALLOWED_CV_EXTENSIONS = frozenset({'.pdf', '.docx', '.doc', '.txt'})
+
+# Spaces and path separators in names become underscores in stored CV filenames
+FILENAME_TRANSLATION = str.maketrans({' ': '_', '/': '_', '\\': '_'})
+
+logger.info("🚀 Starting HR System Backend...")
 
 # Initialize services
 try:
-    user_service = UserService()
-    print("✅ UserService initialized")
+    user_service = get_user_service()
+    logger.info("✅ UserService initialized")
 except Exception as e:
-    print(f"❌ Error initializing UserService: {e}")
+    logger.error("❌ Error initializing UserService: %s", e)
     user_service = None
 
 # Initialize the HR Agent
 try:
     GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
     if not GOOGLE_API_KEY:
-        print("❌ GOOGLE_API_KEY not found in environment variables")
-        print("Please set your Google API key in the .env file")
+        logger.error("❌ GOOGLE_API_KEY not found in environment variables")
+        logger.error("Please set your Google API key in the .env file")
         hr_agent = None
     else:
         DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
         hr_agent = HRAgent(GOOGLE_API_KEY, DATA_DIR)
-        print("✅ HR Agent initialized successfully!")
+        logger.info("✅ HR Agent initialized successfully!")
+        # Warm up in the background; a search arriving first simply waits for the encoder lock
+        threading.Thread(target=hr_agent.warm, name="hr-agent-warmup", daemon=True).start()
     
 except Exception as e:
-    print(f"❌ Error initializing HR Agent: {e}")
-    print(traceback.format_exc())
+    logger.exception("❌ Error initializing HR Agent: %s", e)
     hr_agent = None
 
 @app.route('/', methods=['GET'])
@@ -73,7 +145,7 @@ def login():
         username = data.get('username')
         password = data.get('password')
         
-        print(f"🔐 Login attempt for user: {username}")
+        logger.info("🔐 Login attempt for user: %s", username)
         
         if not username or not password:
             return jsonify({"error": "Username and password required"}), 400
@@ -88,7 +160,7 @@ def login():
             session['user'] = user
             session.permanent = True
             
-            print(f"✅ Login successful for {username} - Role: {user['role']}")
+            logger.info("✅ Login successful for %s - Role: %s", username, user['role'])
             
             return jsonify({
                 "success": True,
@@ -96,18 +168,18 @@ def login():
                 "message": f"Welcome {user['name']}!"
             })
         else:
-            print(f"❌ Login failed for {username}")
+            logger.warning("❌ Login failed for %s", username)
             return jsonify({"error": "Invalid credentials"}), 401
             
     except Exception as e:
-        print(f"❌ Login error: {e}")
+        logger.error("❌ Login error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/logout', methods=['POST'])
 def logout():
     """User logout endpoint"""
     user = session.get('user', {})
-    print(f"👋 Logout request for: {user.get('name', 'Unknown')}")
+    logger.info("👋 Logout request for: %s", user.get('name', 'Unknown'))
     session.clear()
     return jsonify({"success": True, "message": "Logged out successfully"})
 
@@ -117,10 +189,10 @@ def current_user():
     user = session.get('user')
     
     if user:
-        print(f"👤 Current user check: {user['name']} ({user['role']})")
+        logger.debug("👤 Current user check: %s (%s)", user['name'], user['role'])
         return jsonify({"user": user})
     else:
-        print("❌ No user in session")
+        logger.debug("❌ No user in session")
         return jsonify({"error": "Not logged in"}), 401
 
 @app.route('/chat', methods=['POST'])
@@ -130,10 +202,10 @@ def chat():
         # Check if user is logged in
         user = session.get('user')
         if not user:
-            print("❌ No user in session - authentication required")
+            logger.debug("❌ No user in session - authentication required")
             return jsonify({"error": "Please login to access the system"}), 401
         
-        print(f"💬 Chat request from: {user['name']} ({user['role']})")
+        logger.debug("💬 Chat request from: %s (%s)", user['name'], user['role'])
         
         if not hr_agent:
             return jsonify({
@@ -145,20 +217,19 @@ def chat():
             return jsonify({"error": "Message is required"}), 400
         
         user_message = data['message']
-        print(f"📝 Processing message: '{user_message}'")
+        logger.debug("📝 Processing message: '%s'", user_message)
         
         # Process the query using the HR Agent with user context
         response = hr_agent.process_query(user_message, user)
         
-        print(f"✅ Response generated successfully")
+        logger.debug("✅ Response generated successfully")
         return jsonify({
             "response": response,
             "status": "success"
         })
     
     except Exception as e:
-        print(f"❌ Error in chat endpoint: {e}")
-        print(traceback.format_exc())
+        logger.exception("❌ Error in chat endpoint: %s", e)
         return jsonify({
             "error": f"Internal server error: {str(e)}"
         }), 500
@@ -188,22 +259,23 @@ def upload_cv():
             return jsonify({"error": "No file selected"}), 400
         
         # Check supported file formats
-        allowed_extensions = {'.pdf', '.docx', '.doc', '.txt'}
         file_extension = os.path.splitext(file.filename)[1].lower()
         
-        if file_extension not in allowed_extensions:
+        if file_extension not in ALLOWED_CV_EXTENSIONS:
             return jsonify({
-                "error": f"Unsupported file format. Supported formats: {', '.join(allowed_extensions)}"
+                "error": f"Unsupported file format. Supported formats: {', '.join(ALLOWED_CV_EXTENSIONS)}"
             }), 400
         
         # Create unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{candidate_name.replace(' ', '_')}_{position.replace(' ', '_')}_{timestamp}{file_extension}"
+        filename = (
+            f"{candidate_name.translate(FILENAME_TRANSLATION)}_{position.translate(FILENAME_TRANSLATION)}"
+            f"_{datetime.now():%Y%m%d_%H%M%S}{file_extension}"
+        )
         file_path = os.path.join(hr_agent.ats_tools.cv_dir, filename)
         
-        # Save the file
-        file.save(file_path)
-        print(f"📄 File saved: {filename}")
+        # Save the file, copying the upload stream to disk in 1 MB chunks
+        file.save(file_path, buffer_size=UPLOAD_COPY_BUFFER)
+        logger.info("📄 File saved: %s", filename)
         
         # Add to database
         result = hr_agent.ats_tools.add_cv_to_database(file_path, candidate_name, position)
@@ -211,12 +283,12 @@ def upload_cv():
         return jsonify(result)
     
     except Exception as e:
-        print(f"❌ Error in upload_cv endpoint: {e}")
+        logger.error("❌ Error in upload_cv endpoint: %s", e)
         return jsonify({"error": f"Upload failed: {str(e)}"}), 500
 
 if __name__ == '__main__':
     port = int(os.getenv('FLASK_PORT', 5000))
-    print(f"\n🌐 Starting Flask server on port {port}")
-    print("🔗 Backend will be available at: http://localhost:5000")
-    print("🚀 Ready to receive requests!\n")
+    logger.info("🌐 Starting Flask server on port %s", port)
+    logger.info("🔗 Backend will be available at: http://localhost:5000")
+    logger.info("🚀 Ready to receive requests!")
     app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -1,16 +1,32 @@
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+import logging
 import os
+import threading
 from dotenv import load_dotenv
 from typing import Optional
-import sys
-
-# Add parent directory to path to import services
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# One pool is shared by every service: keep some connections warm, reap idle ones after
+# five minutes, and fail fast instead of queueing forever when the pool or server is unavailable
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": 200,
+    "minPoolSize": 10,
+    "maxIdleTimeMS": 300_000,
+    "waitQueueTimeoutMS": 5000,
+    "serverSelectionTimeoutMS": 3000,
+    "retryWrites": True,
+    "appname": "hr-ats",
+}
+
+# Seed documents per insert_many call, keeping each BSON payload small for large seed files
+SEED_INSERT_BATCH = 1000
+
 class DatabaseManager:
     def __init__(self):
         self.client: Optional[MongoClient] = None
@@ -25,24 +41,27 @@ class DatabaseManager:
             mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
             database_name = os.getenv('DATABASE_NAME', 'hr_system_complete')
             
-            self.client = MongoClient(mongodb_uri)
+            self.client = MongoClient(mongodb_uri, **MONGO_CLIENT_OPTIONS)
             self.db = self.client[database_name]
             
             # Test connection
             self.client.admin.command('ping')
-            print(f"✅ Connected to MongoDB database: {database_name}")
+            logger.info("✅ Connected to MongoDB database: %s", database_name)
             
             # Initialize data loader
             data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
             from services.data_loader import DataLoader
             self.data_loader = DataLoader(data_dir)
             
-            # Initialize collections if they don't exist
-            self._initialize_collections()
+            # Initialize collections if they don't exist; ATS_BOOTSTRAP_DATA=0 leaves seeding to manage_data.py reload
+            if os.getenv('ATS_BOOTSTRAP_DATA', '1') != '0':
+                self._initialize_collections()
+            self._create_indexes()
+            self._warm_collections()
             
         except Exception as e:
-            print(f"❌ Error connecting to MongoDB: {e}")
-            print("Please ensure MongoDB is running on localhost:27017")
+            logger.error("❌ Error connecting to MongoDB: %s", e)
+            logger.error("Please ensure MongoDB is running on localhost:27017")
             raise
     
     def _initialize_collections(self):
@@ -51,38 +70,93 @@ class DatabaseManager:
             # Check if JSON files exist and are valid
             validation = self.data_loader.validate_json_files()
             
-            print("\n📋 JSON File Validation:")
+            logger.info("📋 JSON File Validation:")
             for key, value in validation.items():
                 status = "✅" if value else "❌"
-                print(f"{status} {key}: {value}")
+                logger.info("%s %s: %s", status, key, value)
             
             if not validation["users_file_exists"] or not validation["users_valid_json"]:
-                print("❌ Users JSON file is missing or invalid!")
+                logger.error("❌ Users JSON file is missing or invalid!")
                 return
             
             if not validation["employees_file_exists"] or not validation["employees_valid_json"]:
-                print("❌ Employees JSON file is missing or invalid!")
+                logger.error("❌ Employees JSON file is missing or invalid!")
                 return
             
             # Initialize users collection
-            if self.db.users.count_documents({}) == 0:
+            if self.db.users.estimated_document_count() == 0:
                 self._load_users_from_json()
             else:
                 user_count = self.db.users.count_documents({"is_active": True})
-                print(f"📋 Users collection already has {user_count} active users")
+                logger.info("📋 Users collection already has %s active users", user_count)
             
             # Initialize employees collection  
-            if self.db.employees.count_documents({}) == 0:
+            if self.db.employees.estimated_document_count() == 0:
                 self._load_employees_from_json()
             else:
                 emp_count = self.db.employees.count_documents({"status": "active"})
-                print(f"📋 Employees collection already has {emp_count} active employees")
+                logger.info("📋 Employees collection already has %s active employees", emp_count)
             
             # Print final statistics
             self._print_database_stats()
             
         except Exception as e:
-            print(f"❌ Error initializing collections: {e}")
+            logger.error("❌ Error initializing collections: %s", e)
+        finally:
+            self.data_loader.clear_parsed()
+    
+    def reload_from_json(self, force: bool = False):
+        """Seed empty collections from the JSON files; force clears users and employees first"""
+        if force:
+            self.db.users.delete_many({})
+            self.db.employees.delete_many({})
+            logger.warning("⚠️ Cleared users and employees collections")
+        self._initialize_collections()
+    
+    def _create_indexes(self):
+        """Create the indexes the service queries filter on; existing indexes are left as they are"""
+        indexes = [
+            # Duplicate checks and lookups by name (+ position) among active candidates
+            ("candidates", [("candidate_name", 1), ("position", 1), ("status", 1)], {"name": "cand_pos_status"}),
+            # Active-candidate scans, filters and analytics by position, skill and experience
+            ("candidates", [("status", 1), ("position", 1)], {}),
+            ("candidates", [("status", 1), ("skills", 1)], {}),
+            ("candidates", [("status", 1), ("experience_years", 1)], {}),
+            ("users", [("username", 1)], {"unique": True}),
+            ("employees", [("employee_id", 1)], {"unique": True}),
+            ("employees", [("status", 1), ("department", 1)], {}),
+            # Employee name lookups: whole words through the text index, anchored prefixes through the name index.
+            # No language, so names are neither stemmed nor dropped as stop words
+            ("employees", [("name", "text"), ("department", "text"), ("position", "text")],
+             {"name": "employee_text", "default_language": "none"}),
+            ("employees", [("name", 1)], {}),
+        ]
+        for collection_name, keys, options in indexes:
+            try:
+                self.db[collection_name].create_index(keys, **options)
+            except Exception as e:
+                # e.g. existing duplicate data prevents a unique index; queries still work without it
+                logger.warning("⚠️ Could not create index %s on %s: %s", keys, collection_name, e)
+    
+    def _insert_in_batches(self, collection: Collection, documents: list) -> int:
+        """Insert documents in unordered batches so one bad document does not abort the rest"""
+        inserted = 0
+        for start in range(0, len(documents), SEED_INSERT_BATCH):
+            try:
+                result = collection.insert_many(documents[start:start + SEED_INSERT_BATCH], ordered=False)
+                inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                inserted += e.details.get("nInserted", 0)
+                logger.warning("⚠️ Skipped %s invalid documents in %s", len(e.details.get("writeErrors", [])), collection.name)
+        return inserted
+    
+    def _warm_collections(self):
+        """Touch each collection once so the first request does not pay for opening sockets"""
+        for collection_name in ("users", "employees", "candidates"):
+            try:
+                self.db[collection_name].find_one({}, {"_id": 1})
+            except Exception as e:
+                logger.warning("⚠️ Could not warm %s collection: %s", collection_name, e)
     
     def _load_users_from_json(self):
         """Load users from JSON file into MongoDB"""
@@ -90,13 +164,13 @@ class DatabaseManager:
             users_data = self.data_loader.load_users_from_json()
             
             if users_data:
-                self.db.users.insert_many(users_data)
-                print(f"✅ Loaded {len(users_data)} users from JSON into MongoDB")
+                inserted = self._insert_in_batches(self.db.users, users_data)
+                logger.info("✅ Loaded %s users from JSON into MongoDB", inserted)
             else:
-                print("❌ No users data found in JSON file")
+                logger.error("❌ No users data found in JSON file")
                 
         except Exception as e:
-            print(f"❌ Error loading users from JSON: {e}")
+            logger.error("❌ Error loading users from JSON: %s", e)
     
     def _load_employees_from_json(self):
         """Load employees from JSON file into MongoDB"""
@@ -104,13 +178,13 @@ class DatabaseManager:
             employees_data = self.data_loader.load_employees_from_json()
             
             if employees_data:
-                self.db.employees.insert_many(employees_data)
-                print(f"✅ Loaded {len(employees_data)} employees from JSON into MongoDB")
+                inserted = self._insert_in_batches(self.db.employees, employees_data)
+                logger.info("✅ Loaded %s employees from JSON into MongoDB", inserted)
             else:
-                print("❌ No employees data found in JSON file")
+                logger.error("❌ No employees data found in JSON file")
                 
         except Exception as e:
-            print(f"❌ Error loading employees from JSON: {e}")
+            logger.error("❌ Error loading employees from JSON: %s", e)
     
     def _print_database_stats(self):
         """Print database statistics"""
@@ -119,12 +193,12 @@ class DatabaseManager:
             employee_count = self.db.employees.count_documents({"status": "active"})
             candidate_count = self.db.candidates.count_documents({"status": "active"})
             
-            print("\n" + "="*50)
-            print("📊 DATABASE STATISTICS")
-            print("="*50)
-            print(f"👥 Active Users: {user_count}")
-            print(f"💼 Active Employees: {employee_count}")
-            print(f"📋 Active Candidates: {candidate_count}")
+            logger.info("=" * 50)
+            logger.info("📊 DATABASE STATISTICS")
+            logger.info("=" * 50)
+            logger.info("👥 Active Users: %s", user_count)
+            logger.info("💼 Active Employees: %s", employee_count)
+            logger.info("📋 Active Candidates: %s", candidate_count)
             
             # Show some sample employee IDs for testing
             sample_employees = list(self.db.employees.find(
@@ -133,14 +207,14 @@ class DatabaseManager:
             ).limit(5))
             
             if sample_employees:
-                print(f"\n🔍 Sample Employee IDs for testing:")
+                logger.info("🔍 Sample Employee IDs for testing:")
                 for emp in sample_employees:
-                    print(f"   - {emp['employee_id']}: {emp['name']}")
+                    logger.info("   - %s: %s", emp['employee_id'], emp['name'])
             
-            print("="*50)
+            logger.info("=" * 50)
             
         except Exception as e:
-            print(f"❌ Error printing database stats: {e}")
+            logger.error("❌ Error printing database stats: %s", e)
     
     def get_collection(self, collection_name: str) -> Collection:
         """Get a specific collection"""
@@ -150,7 +224,17 @@ class DatabaseManager:
         """Close database connection"""
         if self.client:
             self.client.close()
-            print("✅ Database connection closed")
+            logger.info("✅ Database connection closed")
+
+# Global database instance, connected on first use rather than on import
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
 
-# Global database instance
-db_manager = DatabaseManager()
\ No newline at end of file
+def get_db_manager() -> DatabaseManager:
+    """Shared DatabaseManager, created by whichever thread asks first"""
+    global _db_manager
+    if _db_manager is None:
+        with _db_manager_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager()
+    return _db_manager
\ No newline at end of file
@@ -0,0 +1,30 @@
+import logging
+import logging.handlers
+import queue
+import atexit
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_listener = None
+
+def setup_logging():
+    """Send all log records through a queue so request threads never block on console writes"""
+    global _listener
+    if _listener is not None:
+        return
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    # A background thread drains the queue and does the actual I/O
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, console_handler, respect_handler_level=True)
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root_logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,12 @@
+import os
+
+def available_cpus() -> int:
+    """CPUs this process may run on (its affinity/cgroup cpuset), not every CPU on the host"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def setup_thread_env():
+    """Size native thread pools to the usable CPUs; must run before faiss, torch or tokenizers load"""
+    os.environ.setdefault("OMP_NUM_THREADS", str(available_cpus()))
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
@@ -8,7 +8,12 @@ import sys
 import os
 sys.path.append(os.path.dirname(__file__))
 
-from config.database import db_manager
+from config.logging_config import setup_logging
+
+# The database connection reports through logging
+setup_logging()
+
+from config.database import get_db_manager
 from services.data_loader import DataLoader
 import argparse
 import json
@@ -42,13 +47,13 @@ def show_stats():
 def reload_data(force=False):
     """Reload data from JSON files"""
     if validate_files():
-        db_manager.reload_from_json(force=force)
+        get_db_manager().reload_from_json(force=force)
     else:
         print("❌ Cannot reload data - JSON files are invalid")
 
 def sync_to_json():
     """Sync database data to JSON files"""
-    db_manager.sync_data_to_json()
+    get_db_manager().sync_data_to_json()
 
 def main():
     parser = argparse.ArgumentParser(description='HR System Data Management CLI')
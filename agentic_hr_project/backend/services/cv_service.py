@@ -1,36 +1,134 @@
 from typing import Dict, Any, Optional, List
+
+from config.database import get_db_manager
+from datetime import datetime, timezone
+import json
+import logging
 import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import threading
+import time
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Full CV text is by far the largest candidate field; listings that only show names, positions and skills leave it out
+WITHOUT_CV_TEXT = {"cv_text": 0}
+
+# Analytics only change when candidates are saved or removed, so a short-lived copy serves dashboards
+ANALYTICS_CACHE_KEY = "cv:analytics"
+ANALYTICS_CACHE_TTL = 90
 
-from config.database import db_manager
-from datetime import datetime
+def _redis_from_env():
+    """Redis client from REDIS_URL, or None when it is unset or redis is not installed"""
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+    try:
+        import redis
+        return redis.Redis.from_url(redis_url)
+    except ImportError:
+        logger.warning("⚠️ redis not installed - caching analytics in process")
+        return None
 
 class CVService:
-    def __init__(self):
-        self.candidates_collection = db_manager.get_collection('candidates')
+    def __init__(self, redis_client=None):
+        self.candidates_collection = get_db_manager().get_collection('candidates')
+        
+        # Shared across workers through Redis when configured, otherwise a per-process copy
+        self.redis = redis_client if redis_client is not None else _redis_from_env()
+        self._analytics_cache = None
+        self._analytics_cache_lock = threading.Lock()
+        
+        # At most one active candidate per name + position, enforced by the database itself
+        self.unique_candidates = False
+        try:
+            # The earlier non-unique index has the same keys, so it has to go first
+            if "idx_cand_name_pos" in self.candidates_collection.index_information():
+                self.candidates_collection.drop_index("idx_cand_name_pos")
+            self.candidates_collection.create_index(
+                [("candidate_name", 1), ("position", 1)],
+                name="uniq_active_cand_name_pos",
+                unique=True,
+                partialFilterExpression={"status": "active"}
+            )
+            self.unique_candidates = True
+        except Exception as e:
+            # e.g. existing active duplicates; saves fall back to checking before inserting
+            logger.error("❌ Error creating candidate indexes: %s", e)
+    
+    def _cached_analytics(self) -> Optional[Dict[str, Any]]:
+        """Analytics computed within the last ANALYTICS_CACHE_TTL seconds, if any"""
+        if self.redis is not None:
+            try:
+                cached = self.redis.get(ANALYTICS_CACHE_KEY)
+            except Exception as e:
+                logger.warning("⚠️ Analytics cache read failed: %s", e)
+                return None
+            if not cached:
+                return None
+            analytics = json.loads(cached)
+            if "top_skills" in analytics:
+                analytics["top_skills"] = [tuple(skill) for skill in analytics["top_skills"]]
+            return analytics
+        
+        with self._analytics_cache_lock:
+            if self._analytics_cache and time.monotonic() - self._analytics_cache[0] < ANALYTICS_CACHE_TTL:
+                return self._analytics_cache[1]
+        return None
+    
+    def _store_analytics(self, analytics: Dict[str, Any]):
+        """Keep freshly computed analytics for ANALYTICS_CACHE_TTL seconds"""
+        if self.redis is not None:
+            try:
+                self.redis.setex(ANALYTICS_CACHE_KEY, ANALYTICS_CACHE_TTL, json.dumps(analytics))
+            except Exception as e:
+                logger.warning("⚠️ Analytics cache write failed: %s", e)
+            return
+        
+        with self._analytics_cache_lock:
+            self._analytics_cache = (time.monotonic(), analytics)
+    
+    def invalidate_analytics(self):
+        """Drop cached analytics after candidates are added or removed"""
+        if self.redis is not None:
+            try:
+                self.redis.delete(ANALYTICS_CACHE_KEY)
+            except Exception as e:
+                logger.warning("⚠️ Analytics cache invalidation failed: %s", e)
+        
+        with self._analytics_cache_lock:
+            self._analytics_cache = None
     
     def save_candidate_to_db(self, candidate_data: Dict[str, Any]) -> Dict[str, Any]:
         """Save candidate information to MongoDB with duplicate checking"""
         try:
-            # Check if candidate already exists (by name + position)
-            existing_candidate = self.candidates_collection.find_one({
+            already_exists = {
+                "success": False,
+                "message": f"Candidate {candidate_data['candidate_name']} for position {candidate_data['position']} already exists"
+            }
+            
+            # Without the unique index, check if candidate already exists (by name + position)
+            if not self.unique_candidates and self.candidates_collection.find_one({
                 "candidate_name": candidate_data['candidate_name'],
                 "position": candidate_data['position'],
                 "status": "active"
-            })
-            
-            if existing_candidate:
-                return {
-                    "success": False,
-                    "message": f"Candidate {candidate_data['candidate_name']} for position {candidate_data['position']} already exists"
-                }
+            }):
+                return already_exists
             
             # Add metadata
-            candidate_data['created_at'] = datetime.utcnow().isoformat()
+            candidate_data['created_at'] = datetime.now(timezone.utc).isoformat()
             candidate_data['status'] = 'active'
             
-            result = self.candidates_collection.insert_one(candidate_data)
+            # With the unique index the insert itself is the duplicate check, so there is no race window
+            try:
+                result = self.candidates_collection.insert_one(candidate_data)
+            except DuplicateKeyError:
+                return already_exists
+            
+            self.invalidate_analytics()
             
             return {
                 "success": True,
@@ -39,23 +137,119 @@ class CVService:
             }
                 
         except Exception as e:
-            print(f"❌ Error saving candidate: {e}")
+            logger.error("❌ Error saving candidate: %s", e)
             return {"success": False, "message": f"Error saving candidate: {str(e)}"}
     
-    def get_all_candidates(self) -> List[Dict[str, Any]]:
+    def save_candidates_to_db(self, candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Save several candidates in one insert, skipping existing name + position pairs"""
+        try:
+            if not candidates:
+                return {"success": True, "message": "No candidates to save", "saved": []}
+            
+            # Look up every duplicate in a single query
+            existing = self.candidates_collection.find(
+                {
+                    "status": "active",
+                    "$or": [
+                        {"candidate_name": c["candidate_name"], "position": c["position"]}
+                        for c in candidates
+                    ]
+                },
+                {"candidate_name": 1, "position": 1}
+            )
+            seen = {(doc["candidate_name"], doc["position"]) for doc in existing}
+            
+            new_candidates = []
+            for candidate_data in candidates:
+                key = (candidate_data["candidate_name"], candidate_data["position"])
+                if key in seen:
+                    logger.info("⏭️ Candidate %s for position %s already exists, skipping...", key[0], key[1])
+                    continue
+                seen.add(key)
+                new_candidates.append(candidate_data)
+            
+            if not new_candidates:
+                return {"success": False, "message": "All candidates already exist", "saved": []}
+            
+            # Add metadata
+            created_at = datetime.now(timezone.utc).isoformat()
+            for candidate_data in new_candidates:
+                candidate_data['created_at'] = created_at
+                candidate_data['status'] = 'active'
+            
+            try:
+                self.candidates_collection.insert_many(new_candidates, ordered=False)
+            except BulkWriteError as e:
+                # A concurrent save got some of these in first; the unordered insert still saved the rest
+                write_errors = e.details.get("writeErrors", [])
+                duplicates = {error["index"] for error in write_errors if error.get("code") == DUPLICATE_KEY_ERROR}
+                if len(duplicates) < len(write_errors):
+                    raise
+                new_candidates = [c for i, c in enumerate(new_candidates) if i not in duplicates]
+                if not new_candidates:
+                    return {"success": False, "message": "All candidates already exist", "saved": []}
+            
+            self.invalidate_analytics()
+            
+            return {
+                "success": True,
+                "message": f"Added {len(new_candidates)} candidates successfully",
+                "saved": new_candidates
+            }
+            
+        except Exception as e:
+            logger.error("❌ Error saving candidates: %s", e)
+            return {"success": False, "message": f"Error saving candidates: {str(e)}", "saved": []}
+    
+    def get_all_candidates(self, include_cv_text: bool = True) -> List[Dict[str, Any]]:
         """Get all unique candidates from database"""
         try:
-            candidates = list(self.candidates_collection.find({"status": "active"}))
+            candidates = list(self.candidates_collection.find(
+                {"status": "active"}, None if include_cv_text else WITHOUT_CV_TEXT
+            ))
+            
+            # Convert ObjectId to string
+            for candidate in candidates:
+                candidate['_id'] = str(candidate['_id'])
+            
+            logger.debug("✅ Retrieved %s active candidates from database", len(candidates))
+            return candidates
+            
+        except Exception as e:
+            logger.error("❌ Error getting candidates: %s", e)
+            return []
+    
+    def get_unique_candidates(self, include_cv_text: bool = True) -> List[Dict[str, Any]]:
+        """Get active candidates deduplicated by name + position, keeping the newest record"""
+        try:
+            pipeline = [{"$match": {"status": "active"}}]
+            if not include_cv_text:
+                # Dropped before sorting and grouping, so the CV text never flows through the pipeline
+                pipeline.append({"$project": WITHOUT_CV_TEXT})
+            pipeline += [
+                {"$sort": {"candidate_name": 1, "position": 1, "created_at": -1}},
+                {"$group": {
+                    "_id": {
+                        "candidate_name": "$candidate_name",
+                        "position": "$position"
+                    },
+                    "candidate": {"$first": "$$ROOT"}
+                }},
+                {"$replaceRoot": {"newRoot": "$candidate"}},
+                {"$sort": {"candidate_name": 1, "position": 1}}
+            ]
+            
+            candidates = list(self.candidates_collection.aggregate(pipeline))
             
             # Convert ObjectId to string
             for candidate in candidates:
                 candidate['_id'] = str(candidate['_id'])
             
-            print(f"✅ Retrieved {len(candidates)} active candidates from database")
+            logger.debug("✅ Retrieved %s unique active candidates from database", len(candidates))
             return candidates
             
         except Exception as e:
-            print(f"❌ Error getting candidates: {e}")
+            logger.error("❌ Error getting unique candidates: %s", e)
             return []
     
     def get_candidate_by_name(self, candidate_name: str) -> Optional[Dict[str, Any]]:
@@ -72,26 +266,31 @@ class CVService:
             return candidate
             
         except Exception as e:
-            print(f"❌ Error getting candidate: {e}")
+            logger.error("❌ Error getting candidate: %s", e)
             return None
     
     def delete_candidate_from_db(self, candidate_name: str) -> Dict[str, Any]:
         """Delete candidate from database"""
         try:
-            result = self.candidates_collection.update_one(
-                {"candidate_name": candidate_name},
-                {"$set": {"status": "deleted", "deleted_at": datetime.utcnow().isoformat()}}
+            deleted = self.candidates_collection.find_one_and_update(
+                {"candidate_name": candidate_name, "status": "active"},
+                {"$set": {"status": "deleted", "deleted_at": datetime.now(timezone.utc).isoformat()}}
             )
             
-            if result.modified_count > 0:
-                return {"success": True, "message": f"Candidate {candidate_name} deleted successfully"}
+            if deleted:
+                self.invalidate_analytics()
+                return {
+                    "success": True,
+                    "message": f"Candidate {candidate_name} deleted successfully",
+                    "candidate_id": str(deleted["_id"])
+                }
             else:
                 return {"success": False, "message": f"Candidate {candidate_name} not found"}
                 
         except Exception as e:
             return {"success": False, "message": f"Error deleting candidate: {str(e)}"}
     
-    def search_candidates_in_db(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def search_candidates_in_db(self, filters: Dict[str, Any], include_cv_text: bool = True) -> List[Dict[str, Any]]:
         """Search candidates in database with filters"""
         try:
             query = {"status": "active"}
@@ -107,78 +306,85 @@ class CVService:
                 # Search for any of the required skills
                 query["skills"] = {"$in": filters["required_skills"]}
             
-            candidates = list(self.candidates_collection.find(query))
+            candidates = list(self.candidates_collection.find(query, None if include_cv_text else WITHOUT_CV_TEXT))
             
             # Convert ObjectId to string
             for candidate in candidates:
                 candidate['_id'] = str(candidate['_id'])
             
-            print(f"🔍 Found {len(candidates)} candidates matching search criteria")
+            logger.debug("🔍 Found %s candidates matching search criteria", len(candidates))
             return candidates
             
         except Exception as e:
-            print(f"❌ Error searching candidates: {e}")
+            logger.error("❌ Error searching candidates: %s", e)
             return []
     
     def get_candidate_analytics(self) -> Dict[str, Any]:
         """Get candidate analytics from database"""
+        analytics = self._cached_analytics()
+        if analytics is not None:
+            return dict(analytics)
+        
         try:
-            total_candidates = self.candidates_collection.count_documents({"status": "active"})
-            
-            if total_candidates == 0:
-                return {"total_candidates": 0}
-            
-            # Aggregation pipeline for analytics
+            # One pass over the active candidates computes every statistic, one facet each
             pipeline = [
                 {"$match": {"status": "active"}},
-                {"$group": {
-                    "_id": "$position",
-                    "count": {"$sum": 1},
-                    "avg_experience": {"$avg": "$experience_years"}
+                {"$facet": {
+                    # Per-position counts and experience
+                    "position_stats": [
+                        {"$group": {
+                            "_id": "$position",
+                            "count": {"$sum": 1},
+                            "avg_experience": {"$avg": "$experience_years"}
+                        }}
+                    ],
+                    # Skills aggregation
+                    "top_skills": [
+                        {"$unwind": "$skills"},
+                        {"$group": {"_id": "$skills", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 10}
+                    ],
+                    # Overall stats
+                    "overall_stats": [
+                        {"$group": {
+                            "_id": None,
+                            "avg_experience": {"$avg": "$experience_years"},
+                            "total_candidates": {"$sum": 1}
+                        }}
+                    ]
                 }}
             ]
             
-            position_stats = list(self.candidates_collection.aggregate(pipeline))
-            
-            # Skills aggregation
-            skills_pipeline = [
-                {"$match": {"status": "active"}},
-                {"$unwind": "$skills"},
-                {"$group": {"_id": "$skills", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 10}
-            ]
-            
-            top_skills = list(self.candidates_collection.aggregate(skills_pipeline))
-            
-            # Overall stats
-            experience_pipeline = [
-                {"$match": {"status": "active"}},
-                {"$group": {
-                    "_id": None,
-                    "avg_experience": {"$avg": "$experience_years"},
-                    "total_candidates": {"$sum": 1}
-                }}
-            ]
+            facets = list(self.candidates_collection.aggregate(pipeline))[0]
+            overall_stats = facets["overall_stats"]
+            total_candidates = overall_stats[0]["total_candidates"] if overall_stats else 0
             
-            overall_stats = list(self.candidates_collection.aggregate(experience_pipeline))
+            if total_candidates == 0:
+                analytics = {"total_candidates": 0}
+            else:
+                position_stats = facets["position_stats"]
+                top_skills = facets["top_skills"]
+                
+                analytics = {
+                    "total_candidates": total_candidates,
+                    "position_distribution": {stat["_id"]: stat["count"] for stat in position_stats},
+                    "average_experience": overall_stats[0]["avg_experience"] if overall_stats else 0,
+                    "top_skills": [(skill["_id"], skill["count"]) for skill in top_skills],
+                    "position_stats": position_stats
+                }
             
-            return {
-                "total_candidates": total_candidates,
-                "position_distribution": {stat["_id"]: stat["count"] for stat in position_stats},
-                "average_experience": overall_stats[0]["avg_experience"] if overall_stats else 0,
-                "top_skills": [(skill["_id"], skill["count"]) for skill in top_skills],
-                "position_stats": position_stats
-            }
+            self._store_analytics(analytics)
+            return dict(analytics)
             
         except Exception as e:
-            print(f"❌ Error getting analytics: {e}")
+            logger.error("❌ Error getting analytics: %s", e)
             return {"error": f"Analytics failed: {str(e)}"}
     
     def remove_duplicate_candidates(self) -> Dict[str, Any]:
         """Remove duplicate candidates based on name + position"""
         try:
-            print("🧹 Checking for duplicate candidates...")
+            logger.info("🧹 Checking for duplicate candidates...")
             
             # Find duplicates using aggregation
             pipeline = [
@@ -188,7 +394,12 @@ class CVService:
                         "candidate_name": "$candidate_name",
                         "position": "$position"
                     },
-                    "docs": {"$push": "$ROOT"},
+                    # Only the fields needed to mark and report each duplicate
+                    "docs": {"$push": {
+                        "_id": "$_id",
+                        "candidate_name": "$candidate_name",
+                        "position": "$position"
+                    }},
                     "count": {"$sum": 1}
                 }},
                 {"$match": {"count": {"$gt": 1}}}
@@ -197,23 +408,26 @@ class CVService:
             duplicates = list(self.candidates_collection.aggregate(pipeline))
             
             if not duplicates:
-                print("✅ No duplicate candidates found")
+                logger.info("✅ No duplicate candidates found")
                 return {"success": True, "message": "No duplicates found", "removed_count": 0}
             
-            removed_count = 0
+            # Keep the first document of each group, mark the others as removed in one bulk write
+            removed_at = datetime.now(timezone.utc).isoformat()
+            operations = [
+                UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"status": "duplicate_removed", "removed_at": removed_at}}
+                )
+                for duplicate_group in duplicates
+                for doc in duplicate_group["docs"][1:]
+            ]
             
-            for duplicate_group in duplicates:
-                docs = duplicate_group["docs"]
-                # Keep the first document, mark others as deleted
-                for doc in docs[1:]:  # Skip the first one
-                    self.candidates_collection.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": {"status": "duplicate_removed", "removed_at": datetime.utcnow().isoformat()}}
-                    )
-                    removed_count += 1
-                    print(f"🗑️ Marked duplicate as removed: {doc['candidate_name']} - {doc['position']}")
+            if operations:
+                self.candidates_collection.bulk_write(operations, ordered=False)
+                self.invalidate_analytics()
+            removed_count = len(operations)
             
-            print(f"✅ Removed {removed_count} duplicate candidates")
+            logger.info("✅ Removed %s duplicate candidates", removed_count)
             return {
                 "success": True,
                 "message": f"Removed {removed_count} duplicate candidates",
@@ -221,5 +435,18 @@ class CVService:
             }
             
         except Exception as e:
-            print(f"❌ Error removing duplicates: {e}")
-            return {"success": False, "message": f"Error removing duplicates: {str(e)}"}
\ No newline at end of file
+            logger.error("❌ Error removing duplicates: %s", e)
+            return {"success": False, "message": f"Error removing duplicates: {str(e)}"}
+
+# One CVService per process; its index setup runs once and the analytics cache is shared
+_cv_service: Optional[CVService] = None
+_cv_service_lock = threading.Lock()
+
+def get_cv_service() -> CVService:
+    """Shared CVService, created on first use"""
+    global _cv_service
+    if _cv_service is None:
+        with _cv_service_lock:
+            if _cv_service is None:
+                _cv_service = CVService()
+    return _cv_service
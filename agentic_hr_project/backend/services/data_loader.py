@@ -1,48 +1,69 @@
 import json
+import logging
 import os
 from typing import Dict, List, Any
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class DataLoader:
     def __init__(self, data_dir: str):
         self.data_dir = data_dir
         self.users_file = os.path.join(data_dir, "sample_users.json")
         self.employees_file = os.path.join(data_dir, "sample_employees.json")
+        # Documents parsed during validation, handed on to the next load of the same unchanged file
+        self._parsed = {}
+    
+    def _file_signature(self, file_path: str) -> tuple:
+        """Modification time and size, to tell whether a file changed since it was parsed"""
+        stat = os.stat(file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _read_json(self, file_path: str) -> Any:
+        """Parse a JSON file, reusing the document validation already parsed if the file is unchanged"""
+        cached = self._parsed.pop(file_path, None)
+        if cached is not None and cached[0] == self._file_signature(file_path):
+            return cached[1]
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def clear_parsed(self):
+        """Drop documents kept from validation that no load needed"""
+        self._parsed.clear()
     
     def load_users_from_json(self) -> List[Dict[str, Any]]:
         """Load users data from JSON file"""
         try:
             if not os.path.exists(self.users_file):
-                print(f"❌ Users file not found: {self.users_file}")
+                logger.error("❌ Users file not found: %s", self.users_file)
                 return []
             
-            with open(self.users_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_json(self.users_file)
             
             users = data.get('users', [])
-            print(f"✅ Loaded {len(users)} users from JSON file")
+            logger.info("✅ Loaded %s users from JSON file", len(users))
             return users
             
         except Exception as e:
-            print(f"❌ Error loading users from JSON: {e}")
+            logger.error("❌ Error loading users from JSON: %s", e)
             return []
     
     def load_employees_from_json(self) -> List[Dict[str, Any]]:
         """Load employees data from JSON file"""
         try:
             if not os.path.exists(self.employees_file):
-                print(f"❌ Employees file not found: {self.employees_file}")
+                logger.error("❌ Employees file not found: %s", self.employees_file)
                 return []
             
-            with open(self.employees_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_json(self.employees_file)
             
             employees = data.get('employees', [])
-            print(f"✅ Loaded {len(employees)} employees from JSON file")
+            logger.info("✅ Loaded %s employees from JSON file", len(employees))
             return employees
             
         except Exception as e:
-            print(f"❌ Error loading employees from JSON: {e}")
+            logger.error("❌ Error loading employees from JSON: %s", e)
             return []
     
     def validate_json_files(self) -> Dict[str, bool]:
@@ -58,22 +79,26 @@ class DataLoader:
         try:
             if os.path.exists(self.users_file):
                 validation["users_file_exists"] = True
+                signature = self._file_signature(self.users_file)
                 with open(self.users_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     if 'users' in data and isinstance(data['users'], list):
                         validation["users_valid_json"] = True
+                        self._parsed[self.users_file] = (signature, data)
         except Exception as e:
-            print(f"❌ Error validating users file: {e}")
+            logger.error("❌ Error validating users file: %s", e)
         
         # Check employees file
         try:
             if os.path.exists(self.employees_file):
                 validation["employees_file_exists"] = True
+                signature = self._file_signature(self.employees_file)
                 with open(self.employees_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                     if 'employees' in data and isinstance(data['employees'], list):
                         validation["employees_valid_json"] = True
+                        self._parsed[self.employees_file] = (signature, data)
         except Exception as e:
-            print(f"❌ Error validating employees file: {e}")
+            logger.error("❌ Error validating employees file: %s", e)
         
         return validation
\ No newline at end of file
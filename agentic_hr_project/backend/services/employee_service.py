@@ -1,106 +1,216 @@
 from typing import Dict, Any, Optional, List
-import os
-import sys
+from collections import OrderedDict
+import logging
 import re
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import threading
+import time
 
-from config.database import db_manager
-from datetime import datetime
+from config.database import get_db_manager
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Stored employee IDs look like EMP001 or ADM001; lookups accept any case and upper-case on a match
+EMPLOYEE_ID_RE = re.compile(r'^(?:EMP|ADM)\d{3}$')
+EMPLOYEE_ID_LOOKUP_RE = re.compile(r'^(?:EMP|ADM)\d{3}$', re.IGNORECASE)
+
+# Text-search matches considered when resolving a name
+NAME_SEARCH_LIMIT = 20
+
+# Only what the payroll arithmetic and report rows read, not bank, address or HR details
+PAYROLL_FIELDS = {
+    "employee_id": 1, "name": 1, "department": 1, "position": 1,
+    "salary": 1, "bonus": 1, "tax_rate": 1, "deductions": 1, "_id": 0
+}
+# Fields shown for employee search results
+SEARCH_FIELDS = {
+    "employee_id": 1, "name": 1, "department": 1, "position": 1,
+    "email": 1, "phone": 1, "status": 1
+}
+# Report queries stream employees in larger batches than the driver default of 101
+PAYROLL_BATCH_SIZE = 200
+
+# Fields a salary update may change
+SALARY_FIELDS = ('salary', 'bonus', 'tax_rate', 'deductions')
+
+# Employee records fetched by ID are reused briefly, since a conversation or report reads the same ones repeatedly
+EMPLOYEE_CACHE_SIZE = 512
+EMPLOYEE_CACHE_TTL = 30.0
+
+# Tax and net pay are worked out in decimal and rounded to whole cents before leaving the service
+CENTS = Decimal('0.01')
+
+def _to_decimal(value) -> Decimal:
+    """Exact decimal for a stored int/float amount or rate (via str, so 0.1 stays 0.1)"""
+    return Decimal(str(value))
 
 class EmployeeService:
     def __init__(self):
-        self.employees_collection = db_manager.get_collection('employees')
-        print("✅ EmployeeService initialized with MongoDB connection")
+        self.employees_collection = get_db_manager().get_collection('employees')
+        self._employee_cache = OrderedDict()
+        self._employee_cache_lock = threading.Lock()
+        logger.info("✅ EmployeeService initialized with MongoDB connection")
+    
+    def _cache_employee(self, employee: Dict[str, Any], now: float):
+        """Remember a copy of an employee record fetched by ID"""
+        with self._employee_cache_lock:
+            self._employee_cache[employee['employee_id']] = (now, dict(employee))
+            self._employee_cache.move_to_end(employee['employee_id'])
+            if len(self._employee_cache) > EMPLOYEE_CACHE_SIZE:
+                self._employee_cache.popitem(last=False)
+    
+    def invalidate_employee(self, employee_id: str):
+        """Forget a cached employee record after it changes"""
+        with self._employee_cache_lock:
+            self._employee_cache.pop(employee_id, None)
     
     def get_employee_by_id(self, employee_id: str) -> Optional[Dict[str, Any]]:
         """Get employee by ID"""
         try:
-            print(f"🔍 Searching for employee by ID: {employee_id}")
+            now = time.monotonic()
+            with self._employee_cache_lock:
+                cached = self._employee_cache.get(employee_id)
+                if cached is not None and now - cached[0] < EMPLOYEE_CACHE_TTL:
+                    self._employee_cache.move_to_end(employee_id)
+                    return dict(cached[1])
+            
+            logger.debug("🔍 Searching for employee by ID: %s", employee_id)
             employee = self.employees_collection.find_one({"employee_id": employee_id})
             
             if employee:
-                print(f"✅ Found employee by ID: {employee['name']}")
+                logger.debug("✅ Found employee by ID: %s", employee['name'])
                 employee['_id'] = str(employee['_id'])
+                self._cache_employee(employee, now)
                 return employee
             else:
-                print(f"❌ Employee ID {employee_id} not found in database")
+                logger.info("❌ Employee ID %s not found in database", employee_id)
                 return None
             
         except Exception as e:
-            print(f"❌ Error getting employee by ID: {e}")
+            logger.error("❌ Error getting employee by ID: %s", e)
             return None
     
+    def get_employees_by_ids(self, employee_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several employees by ID, keyed by employee ID; cached records are reused and the rest fetched in one query"""
+        try:
+            now = time.monotonic()
+            employees = {}
+            with self._employee_cache_lock:
+                for employee_id in employee_ids:
+                    cached = self._employee_cache.get(employee_id)
+                    if cached is not None and now - cached[0] < EMPLOYEE_CACHE_TTL:
+                        self._employee_cache.move_to_end(employee_id)
+                        employees[employee_id] = dict(cached[1])
+            
+            missing = [employee_id for employee_id in employee_ids if employee_id not in employees]
+            if not missing:
+                return employees
+            
+            logger.debug("🔍 Searching for %s employees by ID", len(missing))
+            for employee in self.employees_collection.find({"employee_id": {"$in": missing}}):
+                # Keep the first match per ID, as find_one would
+                if employee['employee_id'] not in employees:
+                    employee['_id'] = str(employee['_id'])
+                    employees[employee['employee_id']] = employee
+                    self._cache_employee(employee, now)
+            
+            logger.debug("✅ Found %s of %s employees by ID", len(employees), len(employee_ids))
+            return employees
+            
+        except Exception as e:
+            logger.error("❌ Error getting employees by ID: %s", e)
+            return {}
+    
+    def _text_search(self, text: str, limit: int = 0, projection: Dict[str, Any] = None,
+                     active_only: bool = True) -> List[Dict[str, Any]]:
+        """Employees sharing a word with text in name, department or position, best matches first"""
+        query = {"$text": {"$search": text}}
+        if active_only:
+            query["status"] = "active"
+        try:
+            employees = list(self.employees_collection.find(
+                query,
+                {**(projection or {}), "score": {"$meta": "textScore"}}
+            ).sort([("score", {"$meta": "textScore"})]).limit(limit))
+        except OperationFailure as e:
+            # e.g. the text index could not be created; callers fall back to prefix matching
+            logger.warning("⚠️ Text search unavailable: %s", e)
+            return []
+        
+        for employee in employees:
+            del employee['score']
+        return employees
+    
     def get_employee_by_name(self, employee_name: str) -> Optional[Dict[str, Any]]:
         """Get employee by name (case-insensitive partial matching)"""
         try:
-            print(f"🔍 Searching for employee by name: '{employee_name}'")
+            logger.debug("🔍 Searching for employee by name: '%s'", employee_name)
             
             # Clean the input name
             clean_name = employee_name.strip()
+            lower_name = clean_name.lower()
+            search_name_parts = set(lower_name.split())
             
-            # Try exact match first (case-insensitive)
-            employee = self.employees_collection.find_one({
-                "name": {"$regex": f"^{re.escape(clean_name)}$", "$options": "i"}
-            })
+            # One indexed text query finds the employees sharing a word with the search
+            candidates = self._text_search(clean_name, NAME_SEARCH_LIMIT, active_only=False)
             
+            # An exact name shares every word with the search, so it ranks among the text matches
+            employee = next((emp for emp in candidates if emp['name'].lower() == lower_name), None)
             if employee:
-                print(f"✅ Found employee by exact name match: {employee['name']}")
+                logger.debug("✅ Found employee by exact name match: %s", employee['name'])
                 employee['_id'] = str(employee['_id'])
                 return employee
             
-            # Try partial match - name contains the search term
+            # Text search only matches whole words, so a name containing the search anywhere
+            # (e.g. "mal per" in "Nimal Perera") needs a regex
             employee = self.employees_collection.find_one({
                 "name": {"$regex": re.escape(clean_name), "$options": "i"}
             })
+            if employee:
+                logger.debug("✅ Found employee by partial name match: %s", employee['name'])
+                employee['_id'] = str(employee['_id'])
+                return employee
             
+            # Only when no name contains the search: an active employee sharing any name part,
+            # so a search that is part of someone's name never resolves to a different person
+            employee = next((
+                emp for emp in candidates
+                if emp.get('status') == 'active' and any(part in search_name_parts for part in emp['name'].lower().split())
+            ), None)
             if employee:
-                print(f"✅ Found employee by partial name match: {employee['name']}")
+                logger.debug("✅ Found employee by name part match: %s", employee['name'])
                 employee['_id'] = str(employee['_id'])
                 return employee
             
-            # Try reverse partial match - search term contains the name
-            all_employees = list(self.employees_collection.find(
-                {"status": "active"}, 
-                {"name": 1, "employee_id": 1}
-            ))
+            logger.info("❌ Employee name '%s' not found in database", employee_name)
             
-            for emp in all_employees:
-                emp_name_parts = emp['name'].lower().split()
-                search_name_parts = clean_name.lower().split()
-                
-                # Check if any part of employee name matches any part of search name
-                if any(emp_part in search_name_parts for emp_part in emp_name_parts):
-                    full_employee = self.employees_collection.find_one({"_id": emp["_id"]})
-                    if full_employee:
-                        print(f"✅ Found employee by name part match: {full_employee['name']}")
-                        full_employee['_id'] = str(full_employee['_id'])
-                        return full_employee
-            
-            print(f"❌ Employee name '{employee_name}' not found in database")
-            
-            # Debug: Show available employee names
-            available_employees = list(self.employees_collection.find(
-                {"status": "active"}, {"name": 1, "employee_id": 1, "_id": 0}
-            ).limit(10))
-            available_names = [f"{emp['employee_id']}: {emp['name']}" for emp in available_employees]
-            print(f"📋 Available employees: {available_names}")
+            # Debug: Show available employee names, only queried when debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                available_employees = list(self.employees_collection.find(
+                    {"status": "active"}, {"name": 1, "employee_id": 1, "_id": 0}
+                ).limit(10))
+                available_names = [f"{emp['employee_id']}: {emp['name']}" for emp in available_employees]
+                logger.debug("📋 Available employees: %s", available_names)
             
             return None
             
         except Exception as e:
-            print(f"❌ Error getting employee by name: {e}")
+            logger.error("❌ Error getting employee by name: %s", e)
             return None
     
     def get_employee_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
         """Get employee by ID or name"""
         try:
-            print(f"🔍 Searching for employee by identifier: '{identifier}'")
+            logger.debug("🔍 Searching for employee by identifier: '%s'", identifier)
             
             # Clean the identifier
             clean_identifier = identifier.strip()
             
             # Try by ID first if it matches the pattern
-            if re.match(r'^(EMP|ADM)\d{3}$', clean_identifier.upper()):
+            if EMPLOYEE_ID_LOOKUP_RE.match(clean_identifier):
                 employee = self.get_employee_by_id(clean_identifier.upper())
                 if employee:
                     return employee
@@ -110,75 +220,93 @@ class EmployeeService:
             if employee:
                 return employee
             
-            print(f"❌ No employee found with identifier: '{identifier}'")
+            logger.info("❌ No employee found with identifier: '%s'", identifier)
             return None
             
         except Exception as e:
-            print(f"❌ Error getting employee by identifier: {e}")
+            logger.error("❌ Error getting employee by identifier: %s", e)
             return None
     
-    def get_all_employees(self) -> List[Dict[str, Any]]:
-        """Get all active employees"""
+    def get_all_employees(self, projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Get all active employees, optionally only the fields in projection"""
         try:
-            employees = list(self.employees_collection.find({"status": "active"}))
+            employees = list(self.employees_collection.find(
+                {"status": "active"}, projection
+            ).batch_size(PAYROLL_BATCH_SIZE))
             
             # Convert ObjectId to string
             for employee in employees:
-                employee['_id'] = str(employee['_id'])
+                if '_id' in employee:
+                    employee['_id'] = str(employee['_id'])
             
-            print(f"✅ Retrieved {len(employees)} active employees")
+            logger.debug("✅ Retrieved %s active employees", len(employees))
             return employees
             
         except Exception as e:
-            print(f"❌ Error getting all employees: {e}")
+            logger.error("❌ Error getting all employees: %s", e)
             return []
     
+    def get_employee_sample(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the ID and name of a few active employees, for 'not found' hints"""
+        try:
+            return list(self.employees_collection.find(
+                {"status": "active"}, {"employee_id": 1, "name": 1, "_id": 0}
+            ).limit(limit))
+            
+        except Exception as e:
+            logger.error("❌ Error getting employee sample: %s", e)
+            return []
+    
+    def _salary_breakdown(self, employee: Dict[str, Any]) -> Dict[str, Any]:
+        """Salary components for an employee record that is already loaded"""
+        # Get salary components with defaults
+        base_salary = employee.get('salary', 0)
+        bonus = employee.get('bonus', 0)
+        tax_rate = employee.get('tax_rate', 0.1)  # Default 10%
+        deductions = employee.get('deductions', 0)
+        
+        # Calculate salary
+        gross_salary = base_salary + bonus
+        tax = (_to_decimal(gross_salary) * _to_decimal(tax_rate)).quantize(CENTS, rounding=ROUND_HALF_UP)
+        net = _to_decimal(gross_salary) - tax - _to_decimal(deductions)
+        tax_amount = float(tax)
+        net_salary = float(net.quantize(CENTS, rounding=ROUND_HALF_UP))
+        
+        return {
+            "employee_id": employee['employee_id'],
+            "name": employee['name'],
+            "department": employee['department'],
+            "position": employee['position'],
+            "base_salary": base_salary,
+            "bonus": bonus,
+            "gross_salary": gross_salary,
+            "tax_rate": tax_rate,
+            "tax_amount": tax_amount,
+            "deductions": deductions,
+            "net_salary": net_salary
+        }
+    
     def calculate_salary(self, employee_id: str) -> Dict[str, Any]:
         """Calculate employee salary"""
         try:
             employee = self.get_employee_by_id(employee_id)
             if not employee:
                 # Show available employees for debugging
-                available_employees = self.get_all_employees()
-                available_list = [(emp['employee_id'], emp['name']) for emp in available_employees[:5]]
+                available_employees = self.get_employee_sample(5)
+                available_list = [(emp['employee_id'], emp['name']) for emp in available_employees]
                 
                 return {
                     "error": f"Employee {employee_id} not found. Available employees: {available_list}"
                 }
             
-            # Get salary components with defaults
-            base_salary = employee.get('salary', 0)
-            bonus = employee.get('bonus', 0)
-            tax_rate = employee.get('tax_rate', 0.1)  # Default 10%
-            deductions = employee.get('deductions', 0)
-            
-            # Calculate salary
-            gross_salary = base_salary + bonus
-            tax_amount = gross_salary * tax_rate
-            net_salary = gross_salary - tax_amount - deductions
+            result = self._salary_breakdown(employee)
+            result["calculation_date"] = datetime.now(timezone.utc).isoformat()
             
-            result = {
-                "employee_id": employee['employee_id'],
-                "name": employee['name'],
-                "department": employee['department'],
-                "position": employee['position'],
-                "base_salary": base_salary,
-                "bonus": bonus,
-                "gross_salary": gross_salary,
-                "tax_rate": tax_rate,
-                "tax_amount": tax_amount,
-                "deductions": deductions,
-                "net_salary": net_salary,
-                "calculation_date": datetime.utcnow().isoformat()
-            }
-            
-            print(f"✅ Calculated salary for {employee['name']}: Rs. {net_salary:,.2f}")
+            logger.debug("✅ Calculated salary for %s: Rs. %s", employee['name'], format(result['net_salary'], ',.2f'))
             return result
             
         except Exception as e:
-            print(f"❌ Error calculating salary: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error calculating salary: %s", e)
             return {"error": f"Error calculating salary: {str(e)}"}
     
     def generate_payroll_report(self, department: str = None) -> Dict[str, Any]:
@@ -189,10 +317,10 @@ class EmployeeService:
                 employees = list(self.employees_collection.find({
                     "department": {"$regex": f"^{re.escape(department)}$", "$options": "i"},
                     "status": "active"
-                }))
+                }, PAYROLL_FIELDS).batch_size(PAYROLL_BATCH_SIZE))
                 report_title = f"{department} Department"
             else:
-                employees = self.get_all_employees()
+                employees = self.get_all_employees(PAYROLL_FIELDS)
                 report_title = "All Departments"
             
             if not employees:
@@ -207,31 +335,25 @@ class EmployeeService:
             total_net_salary = 0
             employee_details = []
             
-            # Calculate for each employee
+            # Calculate for each employee from the rows already fetched, instead of re-reading each one by ID.
+            # Totals are kept as running sums and each breakdown becomes the report row itself
             for employee in employees:
-                salary_calc = self.calculate_salary(employee['employee_id'])
-                if "error" not in salary_calc:
-                    total_base_salary += salary_calc['base_salary']
-                    total_bonus += salary_calc['bonus']
-                    total_gross_salary += salary_calc['gross_salary']
-                    total_tax += salary_calc['tax_amount']
-                    total_deductions += salary_calc['deductions']
-                    total_net_salary += salary_calc['net_salary']
-                    
-                    employee_details.append({
-                        "employee_id": salary_calc['employee_id'],
-                        "name": salary_calc['name'],
-                        "position": salary_calc['position'],
-                        "department": salary_calc['department'],
-                        "base_salary": salary_calc['base_salary'],
-                        "bonus": salary_calc['bonus'],
-                        "gross_salary": salary_calc['gross_salary'],
-                        "tax_amount": salary_calc['tax_amount'],
-                        "deductions": salary_calc['deductions'],
-                        "net_salary": salary_calc['net_salary']
-                    })
-                else:
-                    print(f"⚠️ Failed to calculate salary for {employee.get('name', 'Unknown')}: {salary_calc.get('error')}")
+                try:
+                    salary_calc = self._salary_breakdown(employee)
+                except Exception as e:
+                    logger.warning("⚠️ Failed to calculate salary for %s: Error calculating salary: %s", employee.get('name', 'Unknown'), e)
+                    continue
+                
+                total_base_salary += salary_calc['base_salary']
+                total_bonus += salary_calc['bonus']
+                total_gross_salary += salary_calc['gross_salary']
+                total_tax += salary_calc['tax_amount']
+                total_deductions += salary_calc['deductions']
+                total_net_salary += salary_calc['net_salary']
+                
+                # Report rows carry every breakdown field except the tax rate
+                del salary_calc['tax_rate']
+                employee_details.append(salary_calc)
             
             if not employee_details:
                 return {"error": "No salary calculations could be completed"}
@@ -242,53 +364,60 @@ class EmployeeService:
                 "total_base_salary": total_base_salary,
                 "total_bonus": total_bonus,
                 "total_gross_salary": total_gross_salary,
-                "total_tax": total_tax,
+                "total_tax": round(total_tax, 2),
                 "total_deductions": total_deductions,
-                "total_net_salary": total_net_salary,
+                "total_net_salary": round(total_net_salary, 2),
                 "employees": employee_details,
-                "generated_at": datetime.utcnow().isoformat()
+                "generated_at": datetime.now(timezone.utc).isoformat()
             }
             
-            print(f"✅ Generated payroll report for {report_title}: {len(employee_details)} employees, Total: Rs. {total_net_salary:,.2f}")
+            logger.info("✅ Generated payroll report for %s: %s employees, Total: Rs. %s",
+                        report_title, len(employee_details), format(total_net_salary, ',.2f'))
             return result
             
         except Exception as e:
-            print(f"❌ Error generating payroll report: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error generating payroll report: %s", e)
             return {"error": f"Error generating payroll report: {str(e)}"}
     
     def search_employees(self, search_term: str) -> List[Dict[str, Any]]:
         """Search employees by name, ID, department, or position"""
         try:
-            print(f"🔍 Searching employees with term: '{search_term}'")
-            
-            search_regex = {"$regex": re.escape(search_term), "$options": "i"}
-            
-            # Search in multiple fields
-            query = {
-                "$and": [
-                    {"status": "active"},
-                    {"$or": [
-                        {"name": search_regex},
-                        {"employee_id": search_regex},
-                        {"department": search_regex},
-                        {"position": search_regex}
-                    ]}
-                ]
-            }
+            logger.debug("🔍 Searching employees with term: '%s'", search_term)
+            
+            # Whole words in name, department or position come straight from the text index
+            employees = self._text_search(search_term, projection=SEARCH_FIELDS)
             
-            employees = list(self.employees_collection.find(query))
+            # Otherwise match field prefixes, e.g. a partly typed word, then anywhere in a field,
+            # e.g. "001" in EMP001 or "ngineer" in Engineer
+            for pattern in (f"^{re.escape(search_term)}", re.escape(search_term)):
+                if employees:
+                    break
+                search_regex = {"$regex": pattern, "$options": "i"}
+                
+                # Search in multiple fields
+                query = {
+                    "$and": [
+                        {"status": "active"},
+                        {"$or": [
+                            {"name": search_regex},
+                            {"employee_id": search_regex},
+                            {"department": search_regex},
+                            {"position": search_regex}
+                        ]}
+                    ]
+                }
+                
+                employees = list(self.employees_collection.find(query, SEARCH_FIELDS))
             
             # Convert ObjectId to string
             for employee in employees:
                 employee['_id'] = str(employee['_id'])
             
-            print(f"✅ Found {len(employees)} employees matching '{search_term}'")
+            logger.debug("✅ Found %s employees matching '%s'", len(employees), search_term)
             return employees
             
         except Exception as e:
-            print(f"❌ Error searching employees: {e}")
+            logger.error("❌ Error searching employees: %s", e)
             return []
     
     def update_employee_salary(self, employee_id: str, salary_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -300,12 +429,11 @@ class EmployeeService:
             
             # Prepare update data
             update_data = {
-                "updated_at": datetime.utcnow().isoformat()
+                "updated_at": datetime.now(timezone.utc).isoformat()
             }
             
             # Update allowed fields
-            allowed_fields = ['salary', 'bonus', 'tax_rate', 'deductions']
-            for field in allowed_fields:
+            for field in SALARY_FIELDS:
                 if field in salary_data:
                     update_data[field] = salary_data[field]
             
@@ -314,101 +442,139 @@ class EmployeeService:
                 {"employee_id": employee_id},
                 {"$set": update_data}
             )
+            self.invalidate_employee(employee_id)
             
             if result.modified_count > 0:
-                print(f"✅ Updated salary for {employee['name']}")
+                logger.info("✅ Updated salary for %s", employee['name'])
                 return {"success": True, "message": f"Salary updated for {employee['name']}"}
             else:
                 return {"success": False, "error": "No changes made to salary"}
                 
         except Exception as e:
-            print(f"❌ Error updating salary: {e}")
+            logger.error("❌ Error updating salary: %s", e)
             return {"success": False, "error": f"Error updating salary: {str(e)}"}
     
+    def update_employee_salaries(self, salary_updates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Update salary information for several employees, keyed by employee ID, in one bulk write"""
+        try:
+            if not salary_updates:
+                return {"success": False, "error": "No salary updates given"}
+            
+            updated_at = datetime.now(timezone.utc).isoformat()
+            operations = []
+            for employee_id, salary_data in salary_updates.items():
+                update_data = {"updated_at": updated_at}
+                for field in SALARY_FIELDS:
+                    if field in salary_data:
+                        update_data[field] = salary_data[field]
+                operations.append(UpdateOne({"employee_id": employee_id}, {"$set": update_data}))
+            
+            result = self.employees_collection.bulk_write(operations, ordered=False)
+            for employee_id in salary_updates:
+                self.invalidate_employee(employee_id)
+            
+            logger.info("✅ Updated salary for %s of %s employees", result.modified_count, len(operations))
+            return {
+                "success": result.modified_count > 0,
+                "message": f"Salary updated for {result.modified_count} employees",
+                "matched": result.matched_count,
+                "modified": result.modified_count
+            }
+            
+        except Exception as e:
+            logger.error("❌ Error updating salaries: %s", e)
+            return {"success": False, "error": f"Error updating salaries: {str(e)}"}
+    
     def get_employee_analytics(self) -> Dict[str, Any]:
         """Get employee analytics"""
         try:
-            total_employees = self.employees_collection.count_documents({"status": "active"})
-            
-            if total_employees == 0:
-                return {"total_employees": 0}
-            
-            # Department distribution
-            dept_pipeline = [
-                {"$match": {"status": "active"}},
-                {"$group": {"_id": "$department", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}}
-            ]
-            
-            dept_stats = list(self.employees_collection.aggregate(dept_pipeline))
-            
-            # Salary statistics
-            salary_pipeline = [
+            # One pass over the active employees computes every statistic, one facet each
+            pipeline = [
                 {"$match": {"status": "active"}},
-                {"$group": {
-                    "_id": None,
-                    "avg_salary": {"$avg": "$salary"},
-                    "min_salary": {"$min": "$salary"},
-                    "max_salary": {"$max": "$salary"},
-                    "total_salary": {"$sum": "$salary"}
+                {"$facet": {
+                    # Department distribution
+                    "dept_stats": [
+                        {"$group": {"_id": "$department", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}}
+                    ],
+                    # Salary statistics
+                    "salary_stats": [
+                        {"$group": {
+                            "_id": None,
+                            "avg_salary": {"$avg": "$salary"},
+                            "min_salary": {"$min": "$salary"},
+                            "max_salary": {"$max": "$salary"},
+                            "total_salary": {"$sum": "$salary"}
+                        }}
+                    ],
+                    # Position distribution
+                    "position_stats": [
+                        {"$group": {"_id": "$position", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}}
+                    ],
+                    "total": [{"$count": "employees"}]
                 }}
             ]
             
-            salary_stats = list(self.employees_collection.aggregate(salary_pipeline))
+            facets = list(self.employees_collection.aggregate(pipeline))[0]
+            total_employees = facets["total"][0]["employees"] if facets["total"] else 0
             
-            # Position distribution
-            position_pipeline = [
-                {"$match": {"status": "active"}},
-                {"$group": {"_id": "$position", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}}
-            ]
+            if total_employees == 0:
+                return {"total_employees": 0}
             
-            position_stats = list(self.employees_collection.aggregate(position_pipeline))
+            dept_stats = facets["dept_stats"]
+            salary_stats = facets["salary_stats"]
+            position_stats = facets["position_stats"]
             
             result = {
                 "total_employees": total_employees,
                 "department_distribution": {stat["_id"]: stat["count"] for stat in dept_stats},
                 "position_distribution": {stat["_id"]: stat["count"] for stat in position_stats},
                 "salary_statistics": salary_stats[0] if salary_stats else {},
-                "generated_at": datetime.utcnow().isoformat()
+                "generated_at": datetime.now(timezone.utc).isoformat()
             }
             
-            print(f"✅ Generated employee analytics for {total_employees} employees")
+            logger.info("✅ Generated employee analytics for %s employees", total_employees)
             return result
             
         except Exception as e:
-            print(f"❌ Error generating analytics: {e}")
+            logger.error("❌ Error generating analytics: %s", e)
             return {"error": f"Analytics failed: {str(e)}"}
     
+    def _field_errors(self, employee_data: Dict[str, Any]) -> List[str]:
+        """Problems with an employee record's fields, leaving out the database existence check"""
+        errors = []
+        
+        # Required fields
+        required_fields = ['employee_id', 'name', 'department', 'position', 'salary']
+        for field in required_fields:
+            if field not in employee_data or not employee_data[field]:
+                errors.append(f"Missing required field: {field}")
+        
+        # Validate employee ID format
+        if 'employee_id' in employee_data:
+            if not EMPLOYEE_ID_RE.match(employee_data['employee_id']):
+                errors.append("Employee ID must be in format EMP### or ADM###")
+        
+        # Validate salary
+        if 'salary' in employee_data:
+            try:
+                salary = float(employee_data['salary'])
+                if salary < 0:
+                    errors.append("Salary cannot be negative")
+            except (ValueError, TypeError):
+                errors.append("Salary must be a valid number")
+        
+        return errors
+    
     def validate_employee_data(self, employee_data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate employee data before saving"""
         try:
-            errors = []
-            
-            # Required fields
-            required_fields = ['employee_id', 'name', 'department', 'position', 'salary']
-            for field in required_fields:
-                if field not in employee_data or not employee_data[field]:
-                    errors.append(f"Missing required field: {field}")
-            
-            # Validate employee ID format
-            if 'employee_id' in employee_data:
-                if not re.match(r'^(EMP|ADM)\d{3}$', employee_data['employee_id']):
-                    errors.append("Employee ID must be in format EMP### or ADM###")
-            
-            # Validate salary
-            if 'salary' in employee_data:
-                try:
-                    salary = float(employee_data['salary'])
-                    if salary < 0:
-                        errors.append("Salary cannot be negative")
-                except (ValueError, TypeError):
-                    errors.append("Salary must be a valid number")
+            errors = self._field_errors(employee_data)
             
-            # Check if employee ID already exists
+            # Check if employee ID already exists; an indexed existence check, without fetching the record
             if 'employee_id' in employee_data:
-                existing = self.get_employee_by_id(employee_data['employee_id'])
-                if existing:
+                if self.employees_collection.count_documents({"employee_id": employee_data['employee_id']}, limit=1):
                     errors.append(f"Employee ID {employee_data['employee_id']} already exists")
             
             if errors:
@@ -419,6 +585,80 @@ class EmployeeService:
         except Exception as e:
             return {"valid": False, "errors": [f"Validation error: {str(e)}"]}
     
+    def add_employees_bulk(self, employees: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate and add several employees with one existence query and one insert"""
+        try:
+            if not employees:
+                return {"success": False, "message": "No employees to add", "added": [], "errors": []}
+            
+            row_errors = []
+            valid_rows = []
+            for index, employee_data in enumerate(employees):
+                try:
+                    errors = self._field_errors(employee_data)
+                except Exception as e:
+                    errors = [f"Validation error: {str(e)}"]
+                if errors:
+                    row_errors.append({"index": index, "employee_id": employee_data.get('employee_id'), "errors": errors})
+                else:
+                    valid_rows.append((index, employee_data))
+            
+            # Check every ID at once, including repeats within the batch itself
+            requested_ids = [employee_data['employee_id'] for _, employee_data in valid_rows]
+            taken = {
+                doc['employee_id'] for doc in self.employees_collection.find(
+                    {"employee_id": {"$in": requested_ids}}, {"employee_id": 1, "_id": 0}
+                )
+            }
+            new_rows = []
+            for index, employee_data in valid_rows:
+                if employee_data['employee_id'] in taken:
+                    row_errors.append({
+                        "index": index,
+                        "employee_id": employee_data['employee_id'],
+                        "errors": [f"Employee ID {employee_data['employee_id']} already exists"]
+                    })
+                    continue
+                taken.add(employee_data['employee_id'])
+                new_rows.append((index, employee_data))
+            
+            # Add metadata and defaults for optional fields
+            created_at = datetime.now(timezone.utc).isoformat()
+            for _, employee_data in new_rows:
+                employee_data["created_at"] = created_at
+                employee_data["status"] = "active"
+                employee_data.setdefault("bonus", 0)
+                employee_data.setdefault("tax_rate", 0.1)
+                employee_data.setdefault("deductions", 0)
+            
+            failed = set()
+            if new_rows:
+                try:
+                    self.employees_collection.insert_many([employee_data for _, employee_data in new_rows], ordered=False)
+                except BulkWriteError as e:
+                    # The unordered insert still saved every row that did not fail
+                    for error in e.details.get("writeErrors", []):
+                        index, employee_data = new_rows[error["index"]]
+                        failed.add(error["index"])
+                        row_errors.append({"index": index, "employee_id": employee_data['employee_id'], "errors": [error.get("errmsg", "Insert failed")]})
+            
+            added = [employee_data['employee_id'] for i, (_, employee_data) in enumerate(new_rows) if i not in failed]
+            for employee_id in added:
+                self.invalidate_employee(employee_id)
+            
+            row_errors.sort(key=lambda row: row["index"])
+            logger.info("✅ Added %s of %s employees", len(added), len(employees))
+            return {
+                "success": bool(added),
+                "message": f"Added {len(added)} employees",
+                "added": added,
+                "errors": row_errors
+            }
+            
+        except Exception as e:
+            logger.error("❌ Error adding employees: %s", e)
+            return {"success": False, "error": f"Error adding employees: {str(e)}", "added": [], "errors": []}
+    
     def add_new_employee(self, employee_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add new employee to database"""
         try:
@@ -428,7 +668,7 @@ class EmployeeService:
                 return {"success": False, "errors": validation["errors"]}
             
             # Add metadata
-            employee_data["created_at"] = datetime.utcnow().isoformat()
+            employee_data["created_at"] = datetime.now(timezone.utc).isoformat()
             employee_data["status"] = "active"
             
             # Set defaults for optional fields
@@ -438,8 +678,9 @@ class EmployeeService:
             
             # Insert into database
             result = self.employees_collection.insert_one(employee_data)
+            self.invalidate_employee(employee_data['employee_id'])
             
-            print(f"✅ Added new employee: {employee_data['name']} ({employee_data['employee_id']})")
+            logger.info("✅ Added new employee: %s (%s)", employee_data['name'], employee_data['employee_id'])
             return {
                 "success": True,
                 "message": f"Employee {employee_data['name']} added successfully",
@@ -447,5 +688,18 @@ class EmployeeService:
             }
             
         except Exception as e:
-            print(f"❌ Error adding employee: {e}")
-            return {"success": False, "error": f"Error adding employee: {str(e)}"}
\ No newline at end of file
+            logger.error("❌ Error adding employee: %s", e)
+            return {"success": False, "error": f"Error adding employee: {str(e)}"}
+
+# One EmployeeService per process, so the payroll tools and any other caller share its record cache
+_employee_service: Optional[EmployeeService] = None
+_employee_service_lock = threading.Lock()
+
+def get_employee_service() -> EmployeeService:
+    """Shared EmployeeService, created on first use"""
+    global _employee_service
+    if _employee_service is None:
+        with _employee_service_lock:
+            if _employee_service is None:
+                _employee_service = EmployeeService()
+    return _employee_service
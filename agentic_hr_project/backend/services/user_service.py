@@ -1,13 +1,61 @@
 from typing import Dict, Any, Optional
-import os
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import hmac
+import logging
+import threading
 
-from config.database import db_manager
+from config.database import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+# argon2 hashes are verified in C with the GIL released, so concurrent logins are not serialised
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHash, VerificationError
+    PASSWORD_HASHER = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+except ImportError:
+    PASSWORD_HASHER = None
+    logger.warning("⚠️ argon2-cffi not installed - passwords are compared as stored")
+
+# Fields a login reads; the rest of the user record stays in the database
+USER_AUTH_FIELDS = {
+    "username": 1, "password": 1, "role": 1, "name": 1,
+    "employee_id": 1, "email": 1, "department": 1, "phone": 1
+}
 
 class UserService:
     def __init__(self):
-        self.users_collection = db_manager.get_collection('users')
+        self.users_collection = get_db_manager().get_collection('users')
+    
+    def _store_password_hash(self, user: Dict[str, Any], password: str):
+        """Replace the stored password with a fresh argon2 hash"""
+        try:
+            self.users_collection.update_one(
+                {"_id": user["_id"]},
+                {"$set": {"password": PASSWORD_HASHER.hash(password)}}
+            )
+        except Exception as e:
+            logger.warning("⚠️ Could not upgrade password hash for %s: %s", user['username'], e)
+    
+    def _check_password(self, user: Dict[str, Any], password: str) -> bool:
+        """Check a password against its argon2 hash; plain-text seed passwords are upgraded on first login"""
+        stored = user['password']
+        if stored.startswith('$argon2'):
+            if PASSWORD_HASHER is None:
+                logger.error("❌ argon2-cffi is required to verify hashed passwords")
+                return False
+            try:
+                PASSWORD_HASHER.verify(stored, password)
+            except (VerificationError, InvalidHash):
+                return False
+            if PASSWORD_HASHER.check_needs_rehash(stored):
+                self._store_password_hash(user, password)
+            return True
+        
+        if not hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8")):
+            return False
+        if PASSWORD_HASHER is not None:
+            self._store_password_hash(user, password)
+        return True
     
     def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user credentials"""
@@ -16,14 +64,13 @@ class UserService:
             user = self.users_collection.find_one({
                 "username": username,
                 "is_active": True
-            })
+            }, USER_AUTH_FIELDS)
             
             if not user:
-                print(f"❌ User {username} not found or inactive")
+                logger.warning("❌ User %s not found or inactive", username)
                 return None
             
-            # Simple password check (in production, use bcrypt)
-            if user['password'] == password:
+            if self._check_password(user, password):
                 # Remove password from returned user data
                 user_data = {
                     "username": user['username'],
@@ -34,14 +81,14 @@ class UserService:
                     "department": user.get('department'),
                     "phone": user.get('phone')
                 }
-                print(f"✅ User {username} authenticated successfully")
+                logger.info("✅ User %s authenticated successfully", username)
                 return user_data
             else:
-                print(f"❌ Invalid password for user {username}")
+                logger.warning("❌ Invalid password for user %s", username)
                 return None
             
         except Exception as e:
-            print(f"❌ Error authenticating user: {e}")
+            logger.error("❌ Error authenticating user: %s", e)
             return None
     
     def get_all_users(self) -> list:
@@ -59,5 +106,18 @@ class UserService:
             return users
             
         except Exception as e:
-            print(f"❌ Error getting all users: {e}")
-            return []
\ No newline at end of file
+            logger.error("❌ Error getting all users: %s", e)
+            return []
+
+# One UserService per process, shared by every request
+_user_service: Optional[UserService] = None
+_user_service_lock = threading.Lock()
+
+def get_user_service() -> UserService:
+    """Shared UserService, created on first use"""
+    global _user_service
+    if _user_service is None:
+        with _user_service_lock:
+            if _user_service is None:
+                _user_service = UserService()
+    return _user_service
@@ -0,0 +1,151 @@
+"""Pins employee name lookup and search to the matching order of the original regex queries"""
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.employee_service as employee_service
+
+EMPLOYEES = [
+    ("Nimal Perera", "active", "IT", "Software Engineer"),
+    ("John Smith", "inactive", "HR", "Developer"),
+    ("John Smithson", "active", "Finance", "Accountant"),
+    ("Kamal Silva", "active", "IT", "Software Engineer"),
+    ("Jane Doe", "active", "HR", "Developer"),
+    ("Sunil Perera", "inactive", "Finance", "Accountant"),
+    ("Anne Marie Lee", "active", "IT", "Software Engineer"),
+    ("Mal Fernando", "active", "HR", "Developer"),
+    ("Ravi Kumar", "active", "Finance", "Accountant"),
+]
+
+# Query -> employee the original exact / partial / name-part regex lookups returned
+NAME_LOOKUPS = {
+    "Pere": "Nimal Perera",
+    "nimal perera": "Nimal Perera",
+    "John Smith": "John Smith",
+    "john": "John Smith",
+    "Smith": "John Smith",
+    "Perera": "Nimal Perera",
+    "Sunil Perera": "Sunil Perera",
+    "Marie": "Anne Marie Lee",
+    "kamal x": "Kamal Silva",
+    "Doe Jane": "Jane Doe",
+    "zzz": None,
+    "ann": "Anne Marie Lee",
+    "Lee": "Anne Marie Lee",
+    "Smithson": "John Smithson",
+    "ohn Sm": "John Smith",
+    "mal per": "Nimal Perera",
+    "Mal": "Nimal Perera",
+    "fernando": "Mal Fernando",
+    "kumar ravi": "Ravi Kumar",
+}
+
+# Searches the text index cannot answer fall back to matching anywhere in a field
+SEARCHES = {
+    "001": ["EMP001"],
+    "ngineer": ["EMP001", "EMP004", "EMP007"],
+    "EMP00": ["EMP001", "EMP003", "EMP004", "EMP005", "EMP007", "EMP008", "EMP009"],
+    "acc": ["EMP003", "EMP009"],
+    "software engineer": ["EMP001", "EMP004", "EMP007"],
+    "zzz": [],
+}
+
+
+def _matches(document, query):
+    """Evaluate the subset of MongoDB query operators the employee service uses"""
+    for key, value in query.items():
+        if key == "$and":
+            if not all(_matches(document, part) for part in value):
+                return False
+        elif key == "$or":
+            if not any(_matches(document, part) for part in value):
+                return False
+        elif key == "$text":
+            words = set(value["$search"].lower().split())
+            text = " ".join(str(document.get(field, "")) for field in ("name", "department", "position"))
+            if not words & set(text.lower().split()):
+                return False
+        elif isinstance(value, dict) and "$regex" in value:
+            flags = re.IGNORECASE if "i" in value.get("$options", "") else 0
+            if not re.search(value["$regex"], str(document.get(key, "")), flags):
+                return False
+        elif document.get(key) != value:
+            return False
+    return True
+
+
+class FakeCursor(list):
+    def sort(self, *args):
+        return FakeCursor(sorted(self, key=lambda document: -document.get("score", 0)))
+
+    def limit(self, count):
+        return FakeCursor(self[:count] if count else self)
+
+    def batch_size(self, size):
+        return self
+
+
+class FakeCollection:
+    """In-memory stand-in for the employees collection, returning documents in insertion order"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection=None):
+        results = FakeCursor()
+        for document in self.documents:
+            if _matches(document, query):
+                document = dict(document)
+                if "$text" in query:
+                    words = set(query["$text"]["$search"].lower().split())
+                    document["score"] = len(words & set(document["name"].lower().split()))
+                results.append(document)
+        return results
+
+    def find_one(self, query, projection=None):
+        results = self.find(query)
+        return dict(results[0]) if results else None
+
+
+class FakeDbManager:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_collection(self, name):
+        return self.collection
+
+
+class EmployeeLookupTest(unittest.TestCase):
+    def setUp(self):
+        documents = [
+            {
+                "_id": index, "employee_id": f"EMP{index + 1:03d}", "name": name, "status": status,
+                "department": department, "position": position
+            }
+            for index, (name, status, department, position) in enumerate(EMPLOYEES)
+        ]
+        self._original_get_db_manager = employee_service.get_db_manager
+        employee_service.get_db_manager = lambda: FakeDbManager(FakeCollection(documents))
+        self.service = employee_service.EmployeeService()
+
+    def tearDown(self):
+        employee_service.get_db_manager = self._original_get_db_manager
+
+    def test_name_lookup_keeps_original_match_order(self):
+        for query, expected in NAME_LOOKUPS.items():
+            with self.subTest(query=query):
+                employee = self.service.get_employee_by_name(query)
+                self.assertEqual(employee and employee["name"], expected)
+
+    def test_search_falls_back_to_substring_matches(self):
+        for query, expected in SEARCHES.items():
+            with self.subTest(query=query):
+                employees = self.service.search_employees(query)
+                self.assertEqual(sorted(employee["employee_id"] for employee in employees), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
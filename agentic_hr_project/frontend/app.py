@@ -1,6 +1,14 @@
 import streamlit as st
 import requests
 import json
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional: faster (de)serialization of chat payloads
+    orjson = None
 
 # Page configuration
 st.set_page_config(
@@ -58,20 +66,57 @@ st.markdown("""
 # Backend URL
 BACKEND_URL = "http://localhost:5000"
 
+# Seconds a successful health check / current-user answer is reused across reruns of this session
+HEALTH_CACHE_TTL = 30
+CURRENT_USER_CACHE_TTL = 5
+
+@st.cache_resource
+def get_http_adapter():
+    """Keep-alive connection pool shared by every browser session; only idempotent GETs are retried after a response"""
+    # Connection failures are retried for every method, since the request never reached the backend
+    retries = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"])
+    )
+    return HTTPAdapter(pool_connections=10, pool_maxsize=100, max_retries=retries)
+
+def create_requests_session():
+    """Per-user session (own login cookies) on top of the shared connection pool"""
+    session = requests.Session()
+    adapter = get_http_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 # Initialize session for persistent cookies
 if 'requests_session' not in st.session_state:
-    st.session_state.requests_session = requests.Session()
+    st.session_state.requests_session = create_requests_session()
 
 def check_backend_health():
-    """Check if backend is running"""
+    """Check if backend is running; failures are never cached so recovery shows on the next rerun"""
+    cached = st.session_state.get('health_cache')
+    if cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL:
+        return cached[1]
+    
     try:
         response = st.session_state.requests_session.get(f"{BACKEND_URL}/", timeout=5)
-        return response.status_code == 200, response.json()
+        result = (response.status_code == 200, response.json())
     except Exception as e:
         return False, {"error": str(e)}
+    
+    if result[0]:
+        st.session_state.health_cache = (time.monotonic(), result)
+    return result
+
+def invalidate_current_user():
+    """Forget the cached current user, e.g. after login, logout or an expired session"""
+    st.session_state.pop('current_user_cache', None)
 
 def login_user(username, password):
     """Login user with session persistence"""
+    invalidate_current_user()
     try:
         response = st.session_state.requests_session.post(
             f"{BACKEND_URL}/login",
@@ -85,6 +130,7 @@ def login_user(username, password):
 
 def logout_user():
     """Logout user"""
+    invalidate_current_user()
     try:
         response = st.session_state.requests_session.post(f"{BACKEND_URL}/logout", timeout=10)
         return response.json(), response.status_code == 200
@@ -93,24 +139,45 @@ def logout_user():
 
 def get_current_user():
     """Get current logged in user"""
+    cached = st.session_state.get('current_user_cache')
+    if cached and time.monotonic() - cached[0] < CURRENT_USER_CACHE_TTL:
+        return cached[1]
+    
     try:
         response = st.session_state.requests_session.get(f"{BACKEND_URL}/current-user", timeout=10)
         if response.status_code == 200:
-            return response.json().get("user"), True
-        return None, False
+            result = (response.json().get("user"), True)
+        else:
+            result = (None, False)
     except Exception as e:
         return None, False
+    
+    st.session_state.current_user_cache = (time.monotonic(), result)
+    return result
+
+def dumps_json(payload):
+    """Encode a request body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+def loads_json(response):
+    """Decode a response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
 def send_chat_message(message):
     """Send chat message to backend with session"""
     try:
         response = st.session_state.requests_session.post(
             f"{BACKEND_URL}/chat",
-            json={"message": message},
+            data=dumps_json({"message": message}),
+            headers={"Content-Type": "application/json"},
             timeout=30
         )
         
-        return response.json(), response.status_code == 200
+        return loads_json(response), response.status_code == 200
     except Exception as e:
         return {"error": str(e)}, False
 
@@ -315,6 +382,7 @@ How can I help you today?"""
                     error_msg = response_data.get('error', 'Unknown error occurred')
                     if "login" in error_msg.lower():
                         st.error("🔒 Session expired. Please refresh the page and login again.")
+                        invalidate_current_user()
                         st.session_state.logged_in = False
                         st.rerun()
                     response = f"❌ **Error:** {error_msg}"